@@ -0,0 +1,271 @@
+"""
+async_env_pool.py
+------------------
+
+This module drives many simulator instances from one learner process with
+`asyncio`. The production environment is SUMO-based and is controlled over a
+socket (TraCI), so most of the wall time of a step is spent waiting for the
+simulator to answer. Stepping N simulators one after another in the style of
+`TrafficEnv.step` leaves the CPU idle for N round trips; `AsyncEnvPool` sends
+the requests to every simulator first and then awaits all the replies, so the
+round trips overlap and a step of the whole pool costs roughly one round trip.
+
+The wire protocol is deliberately small: newline-delimited JSON messages over
+TCP. A request is `{"cmd": "reset"}` or `{"cmd": "step", "action": a}` and the
+reply carries `state`, and for steps also `reward`, `done` and `info`. A real
+simulator backend only has to speak this protocol (e.g. through a thin TraCI
+adapter). For testing, `FakeTrafficServer` implements it in-process on top of
+`TrafficEnv`, with an optional artificial latency to mimic a remote simulator.
+
+Example
+-------
+
+```python
+import asyncio
+from async_env_pool import AsyncEnvPool, FakeTrafficServer
+
+async def main():
+    async with FakeTrafficServer(latency=0.005) as server:
+        async with AsyncEnvPool([server.address] * 32) as pool:
+            states = await pool.reset_all()
+            states, rewards, dones, info = await pool.step_all([0] * 32)
+
+asyncio.run(main())
+```
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from traffic_env import TrafficEnv
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+def _to_json(value: Any) -> Any:
+    """Convert NumPy values (and tuples of them) to plain JSON types."""
+    return np.asarray(value).tolist()
+
+
+class FakeTrafficServer:
+    """In-process simulator server speaking the pool protocol.
+
+    Every client connection gets its own environment created by
+    `env_fn(connection_index)`, so connections are independent simulators.
+    """
+
+    def __init__(
+        self,
+        env_fn: Callable[[int], Any] = lambda i: TrafficEnv(seed=i),
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        env_fn : Callable[[int], Any]
+            Factory called with the connection index to create the
+            environment served on that connection.
+        host : str
+            Interface to listen on.
+        port : int
+            Port to listen on; 0 picks a free port (see `address`).
+        latency : float
+            Seconds to sleep before answering each request, to mimic the
+            round trip of a remote simulator.
+        """
+        self.env_fn = env_fn
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The `(host, port)` the server is listening on."""
+        return self.host, self.port
+
+    async def start(self) -> None:
+        """Start listening for connections."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop accepting connections and wait for the server to shut down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        env = self.env_fn(self._connections)
+        self._connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                cmd = request.get("cmd")
+                if cmd == "close":
+                    break
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if cmd == "reset":
+                    reply = {"state": _to_json(env.reset())}
+                elif cmd == "step":
+                    try:
+                        state, reward, done, info = env.step(request["action"])
+                    except ValueError as exc:
+                        reply = {"error": str(exc)}
+                    else:
+                        reply = {
+                            "state": _to_json(state),
+                            "reward": float(reward),
+                            "done": bool(done),
+                            "info": {key: _to_json(value) for key, value in info.items()},
+                        }
+                else:
+                    reply = {"error": f"unknown command {cmd!r}"}
+                writer.write(_encode(reply))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> "FakeTrafficServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+class _Connection:
+    """One client socket with at most one request in flight."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.writer.write(_encode(message))
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Simulator closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(f"Simulator error: {reply['error']}")
+        return reply
+
+
+class AsyncEnvPool:
+    """Pool of remote environments stepped concurrently with `asyncio`.
+
+    Environments that finish an episode are reset automatically, as in
+    `VectorTrafficEnv`; `info["final_state"]` holds the states reached
+    before the reset.
+    """
+
+    def __init__(self, addresses: Sequence[Tuple[str, int]], auto_reset: bool = True) -> None:
+        """
+        Parameters
+        ----------
+        addresses : Sequence[Tuple[str, int]]
+            `(host, port)` of each simulator; one connection is opened per
+            entry, so repeating an address opens several simulators on it.
+        auto_reset : bool
+            Reset environments whose episode ended during `step_all`.
+        """
+        self.addresses = list(addresses)
+        self.num_envs = len(self.addresses)
+        self.auto_reset = auto_reset
+        self._connections: List[_Connection] = []
+
+    async def connect(self) -> None:
+        """Open one connection per simulator address."""
+        streams = await asyncio.gather(
+            *(asyncio.open_connection(host, port) for host, port in self.addresses)
+        )
+        self._connections = [_Connection(reader, writer) for reader, writer in streams]
+
+    async def close(self) -> None:
+        """Close every connection."""
+        for conn in self._connections:
+            conn.writer.write(_encode({"cmd": "close"}))
+            conn.writer.close()
+        await asyncio.gather(*(conn.writer.wait_closed() for conn in self._connections),
+                             return_exceptions=True)
+        self._connections = []
+
+    async def reset_all(self) -> np.ndarray:
+        """Reset every environment and return the stacked states."""
+        replies = await asyncio.gather(
+            *(conn.request({"cmd": "reset"}) for conn in self._connections)
+        )
+        return np.array([reply["state"] for reply in replies])
+
+    async def _step_one(self, conn: _Connection, action: Any) -> Tuple[Dict[str, Any], Any]:
+        reply = await conn.request({"cmd": "step", "action": action})
+        state = reply["state"]
+        if reply["done"] and self.auto_reset:
+            state = (await conn.request({"cmd": "reset"}))["state"]
+        return reply, state
+
+    async def step_all(
+        self, actions: Sequence[Any]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Step every environment concurrently.
+
+        Parameters
+        ----------
+        actions : Sequence
+            One action per environment.
+
+        Returns
+        -------
+        states : np.ndarray
+            Stacked next states (after any automatic reset).
+        rewards : np.ndarray
+            Reward per environment.
+        dones : np.ndarray
+            Boolean mask of environments whose episode ended.
+        info : Dict[str, Any]
+            `"final_state"` (states before any reset) and `"infos"` (the
+            per-environment info dicts).
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}")
+        # Let every request finish before raising so no connection is left
+        # with an unread reply
+        results = await asyncio.gather(
+            *(self._step_one(conn, _to_json(action))
+              for conn, action in zip(self._connections, actions)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        replies = [reply for reply, _ in results]
+        states = np.array([state for _, state in results])
+        rewards = np.array([reply["reward"] for reply in replies], dtype=np.float64)
+        dones = np.array([reply["done"] for reply in replies], dtype=bool)
+        info = {
+            "final_state": np.array([reply["state"] for reply in replies]),
+            "infos": [reply["info"] for reply in replies],
+        }
+        return states, rewards, dones, info
+
+    async def __aenter__(self) -> "AsyncEnvPool":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
@@ -0,0 +1,339 @@
+"""
+benchmarks.py
+--------------
+
+Throughput benchmarks for the environment, the tabular agent and the
+baseline controllers, so the performance effect of a change can be measured
+instead of guessed. Each benchmark is run over a small parameter grid and
+reports:
+
+* **rate** – work units per second (`TrafficEnv` steps, Q-learning
+  transitions, baseline episodes or planner decisions), as the best and
+  the median of `repeat` timed runs;
+* **peak memory** – the peak traced allocation of one extra run under
+  `tracemalloc` (NumPy buffers included), measured separately so that
+  tracing does not slow down the timed runs.
+
+Results are written as JSON together with metadata describing where they
+were produced (Python/NumPy versions, platform, CPU count, git commit), so
+runs from different commits or machines can be diffed directly.
+
+Usage
+-----
+
+    python src/benchmarks.py                       # full grid, JSON to stdout
+    python src/benchmarks.py --quick -o before.json
+    python src/benchmarks.py --only env_step q_learning --repeat 5
+
+Key functions:
+
+* `run_benchmarks` – run the selected benchmarks over a grid and return the
+  JSON-serialisable report.
+* `environment_metadata` – describe the interpreter, libraries and commit.
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from baselines import (
+    actuated_control_batch,
+    actuated_control_step,
+    evaluate_baseline,
+    evaluate_baseline_batch,
+)
+from q_learning_agent import train_q_learning, train_q_learning_vectorized
+from rollout_planner import RolloutPlanner
+from traffic_env import TrafficEnv, VectorTrafficEnv
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Parameter grids swept by default and by --quick
+DEFAULT_GRID: Dict[str, List[int]] = {
+    "max_steps": [60, 240],
+    "max_queue": [10, 40],
+    "num_envs": [1, 16, 256],
+}
+QUICK_GRID: Dict[str, List[int]] = {
+    "max_steps": [60],
+    "max_queue": [10],
+    "num_envs": [1, 64],
+}
+
+# Minimum duration of a timed run; the workload is doubled until reached
+_MIN_TIME = 0.25
+
+
+def environment_metadata() -> Dict[str, Any]:
+    """Describe the machine, interpreter, libraries and source revision."""
+    try:
+        import numba
+
+        numba_version: Optional[str] = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+        "numba": numba_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git(["rev-parse", "HEAD"]),
+        "git_dirty": bool(_git(["status", "--porcelain", "--untracked-files=no"])),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def _git(args: Sequence[str]) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True,
+                             text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+# Each benchmark takes the number of episodes and its grid parameters and
+# returns a zero-argument run function (building fresh environments on every
+# call) together with the number of work units one call performs.
+
+def _bench_env_step(episodes: int, max_steps: int) -> Tuple[Callable[[], None], int]:
+    actions = np.random.default_rng(0).integers(0, 2, size=max_steps).tolist()
+
+    def run() -> None:
+        env = TrafficEnv(max_steps=max_steps, seed=0)
+        step = env.step
+        for _ in range(episodes):
+            env.reset()
+            for action in actions:
+                step(action)
+
+    return run, episodes * max_steps
+
+
+def _bench_vector_env_step(episodes: int, max_steps: int,
+                           num_envs: int) -> Tuple[Callable[[], None], int]:
+    def run() -> None:
+        env = VectorTrafficEnv(num_envs, max_steps=max_steps, seed=0)
+        env.reset()
+        actions = env.sample_actions()
+        for _ in range(episodes * max_steps):
+            env.step(actions)
+
+    return run, episodes * max_steps * num_envs
+
+
+def _bench_q_learning(episodes: int, max_steps: int, max_queue: int,
+                      dense: bool) -> Tuple[Callable[[], None], int]:
+    def run() -> None:
+        np.random.seed(0)
+        env = TrafficEnv(max_steps=max_steps, seed=0)
+        train_q_learning(env, episodes=episodes, max_queue=max_queue, dense=dense)
+
+    return run, episodes * max_steps
+
+
+def _bench_q_learning_vectorized(episodes: int, max_steps: int, max_queue: int,
+                                 num_envs: int) -> Tuple[Callable[[], None], int]:
+    def run() -> None:
+        env = VectorTrafficEnv(num_envs, max_steps=max_steps, seed=0)
+        train_q_learning_vectorized(env, episodes=episodes, max_queue=max_queue)
+
+    return run, episodes * max_steps * num_envs
+
+
+def _bench_baseline(episodes: int, max_steps: int) -> Tuple[Callable[[], None], int]:
+    def run() -> None:
+        evaluate_baseline(actuated_control_step, TrafficEnv(max_steps=max_steps, seed=0),
+                          episodes=episodes)
+
+    return run, episodes
+
+
+def _bench_baseline_batch(episodes: int, max_steps: int,
+                          num_envs: int) -> Tuple[Callable[[], None], int]:
+    def run() -> None:
+        env = VectorTrafficEnv(num_envs, max_steps=max_steps, seed=0)
+        evaluate_baseline_batch(actuated_control_batch, env, episodes=episodes)
+
+    return run, episodes * num_envs
+
+
+def _bench_rollout_planner(episodes: int, max_steps: int) -> Tuple[Callable[[], None], int]:
+    def run() -> None:
+        env = TrafficEnv(max_steps=max_steps, seed=0)
+        planner = RolloutPlanner(env, horizon=20, rollouts=128, seed=0)
+        evaluate_baseline(planner, env, episodes=episodes)
+
+    return run, episodes * max_steps
+
+
+# name -> (factory, grid parameters, extra fixed parameters, unit)
+BENCHMARKS: Dict[str, Any] = {
+    "env_step": (_bench_env_step, ["max_steps"], {}, "steps/s"),
+    "vector_env_step": (_bench_vector_env_step, ["max_steps", "num_envs"], {}, "steps/s"),
+    "q_learning": (_bench_q_learning, ["max_steps", "max_queue"], {"dense": False},
+                   "transitions/s"),
+    "q_learning_dense": (_bench_q_learning, ["max_steps", "max_queue"], {"dense": True},
+                         "transitions/s"),
+    "q_learning_vectorized": (_bench_q_learning_vectorized,
+                              ["max_steps", "max_queue", "num_envs"], {}, "transitions/s"),
+    "baseline": (_bench_baseline, ["max_steps"], {}, "episodes/s"),
+    "baseline_batch": (_bench_baseline_batch, ["max_steps", "num_envs"], {}, "episodes/s"),
+    "rollout_planner": (_bench_rollout_planner, ["max_steps"], {}, "decisions/s"),
+}
+
+
+def measure(factory: Callable[[int], Tuple[Callable[[], None], int]],
+            repeat: int = 3) -> Dict[str, Any]:
+    """Time a benchmark and measure its peak traced memory.
+
+    The number of episodes starts at one and doubles until a run takes at
+    least `_MIN_TIME` seconds, so fast and slow configurations are both
+    timed accurately without a hand-tuned workload.
+
+    Parameters
+    ----------
+    factory : Callable[[int], Tuple[Callable[[], None], int]]
+        Maps a number of episodes to a run function and its work units.
+    repeat : int
+        Number of timed calls.
+
+    Returns
+    -------
+    Dict[str, Any]
+        `episodes`, `units`, `seconds` (every timed call), `rate_best`,
+        `rate_median` and `peak_memory_bytes`.
+    """
+    episodes = 1
+    while True:
+        run, units = factory(episodes)
+        start = time.perf_counter()
+        run()  # doubles as the warm-up (imports, JIT compilation, caches)
+        if time.perf_counter() - start >= _MIN_TIME:
+            break
+        episodes *= 2
+
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "episodes": episodes,
+        "units": units,
+        "seconds": seconds,
+        "rate_best": units / min(seconds),
+        "rate_median": units / float(np.median(seconds)),
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_benchmarks(
+    names: Optional[Iterable[str]] = None,
+    grid: Optional[Dict[str, List[int]]] = None,
+    repeat: int = 3,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """Run benchmarks over a parameter grid.
+
+    Parameters
+    ----------
+    names : Iterable[str], optional
+        Benchmarks to run (keys of `BENCHMARKS`); all of them by default.
+    grid : Dict[str, List[int]], optional
+        Values to sweep for `max_steps`, `max_queue` and `num_envs`;
+        `DEFAULT_GRID` by default. Each benchmark sweeps only the
+        parameters it uses.
+    repeat : int
+        Timed runs per grid point.
+    verbose : bool
+        Print a line per grid point to stderr.
+
+    Returns
+    -------
+    Dict[str, Any]
+        `{"metadata": ..., "results": [...]}`; every result holds the
+        benchmark name, its parameters, the unit and the output of
+        `measure`.
+    """
+    grid = grid or DEFAULT_GRID
+    names = list(names or BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}")
+
+    results = []
+    for name in names:
+        factory, keys, fixed, unit = BENCHMARKS[name]
+        for values in itertools.product(*(grid[key] for key in keys)):
+            params = dict(zip(keys, values))
+            bound = functools.partial(factory, **params, **fixed)
+            result = {"benchmark": name, "params": params, "unit": unit}
+            result.update(measure(bound, repeat))
+            results.append(result)
+            if verbose:
+                print(f"{name:<22s} {json.dumps(params):<50s} "
+                      f"{result['rate_best']:>12.0f} {unit}", file=sys.stderr)
+
+    metadata = environment_metadata()
+    metadata["repeat"] = repeat
+    metadata["grid"] = grid
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metadata["max_rss_bytes"] = maxrss if sys.platform == "darwin" else maxrss * 1024
+    return {"metadata": metadata, "results": results}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark environment, agent and baseline throughput."
+    )
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=None,
+                        help="benchmarks to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="use the small parameter grid")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per grid point")
+    parser.add_argument("--max-steps", type=int, nargs="+", default=None)
+    parser.add_argument("--max-queue", type=int, nargs="+", default=None)
+    parser.add_argument("--num-envs", type=int, nargs="+", default=None)
+    parser.add_argument("-o", "--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    grid = dict(QUICK_GRID if args.quick else DEFAULT_GRID)
+    for key in ("max_steps", "max_queue", "num_envs"):
+        if getattr(args, key) is not None:
+            grid[key] = getattr(args, key)
+
+    report = run_benchmarks(args.only, grid, args.repeat, verbose=True)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+early_stopping.py
+------------------
+
+Convergence tracking and early stopping for ``train_q_learning``. Without
+it, training always runs the full number of episodes even when the Q-table
+stopped changing long before, which is where most of the time of a
+hyper-parameter sweep goes on easy configurations.
+
+After every episode ``EarlyStopping`` updates three convergence signals,
+each computed over a rolling window of `window` episodes because single
+episodes are too noisy to judge:
+
+* **Q change** – the mean over the window of the largest absolute change of
+  any Q-value during an episode;
+* **queue trend** – the relative change between the mean average total
+  queue of the last window and that of the window before it;
+* **policy stability** – the number of states whose greedy action differs
+  from the greedy action `window` episodes earlier.
+
+Training stops once every enabled criterion has held for `patience`
+consecutive episodes (and at least `min_episodes` episodes have run). With a
+constant `alpha` and `epsilon` the Q-values never stop moving entirely: the
+Q change settles at a noise floor set by the TD error, so `q_tol` should sit
+just above that floor. Configurations that have not settled simply run to
+the end as before.
+
+Example
+-------
+
+```python
+from early_stopping import EarlyStopping
+from metrics_writer import MetricsWriter
+
+stopper = EarlyStopping(q_tol=0.6, queue_tol=0.02, policy_tol=2)
+with MetricsWriter("logs/q_learning.csv") as writer:
+    q_table, avg_total_queues = train_q_learning(env, episodes=5000, early_stopping=stopper,
+                                                 callback=writer)
+print(stopper.stopped_episode)   # None if all 5000 episodes ran
+```
+
+The stopping episode is also the record with `early_stopped` set in the
+metrics passed to the `callback` (and yielded by ``iter_q_learning``), so a
+metrics sink captures it without a reference to the stopper.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+
+class EarlyStopping:
+    """Decide after each episode whether Q-learning has converged."""
+
+    def __init__(
+        self,
+        q_tol: Optional[float] = 0.6,
+        queue_tol: Optional[float] = 0.02,
+        policy_tol: Optional[int] = 2,
+        window: int = 100,
+        patience: int = 50,
+        min_episodes: int = 200,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        q_tol : float, optional
+            Largest rolling mean of the per-episode maximum absolute
+            Q-value change counted as converged; None disables the
+            criterion.
+        queue_tol : float, optional
+            Largest relative change between consecutive rolling means of
+            the average total queue; None disables the criterion.
+        policy_tol : int, optional
+            Largest number of states whose greedy action changed over the
+            last `window` episodes; None disables the criterion.
+        window : int
+            Episodes per rolling window.
+        patience : int
+            Consecutive converged episodes needed to stop.
+        min_episodes : int
+            Never stop before this many episodes.
+        """
+        if window < 1 or patience < 1:
+            raise ValueError("window and patience must be at least 1")
+        self.q_tol = q_tol
+        self.queue_tol = queue_tol
+        self.policy_tol = policy_tol
+        self.window = window
+        self.patience = patience
+        self.min_episodes = min_episodes
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all history so the object can be reused for a new run."""
+        self.episodes = 0
+        self.streak = 0
+        self.stopped_episode: Optional[int] = None
+        # Per-episode signals, kept for inspection and plotting
+        self.q_deltas: List[float] = []
+        self.q_changes: List[float] = []
+        self.queue_trends: List[float] = []
+        self.policy_changes: List[int] = []
+        self._prev_q: Optional[np.ndarray] = None
+        self._policies: Deque[np.ndarray] = deque(maxlen=self.window + 1)
+        # Prefix sums make every rolling mean O(1) per episode
+        self._q_delta_sums: List[float] = [0.0]
+        self._queue_sums: List[float] = [0.0]
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Return a copy of the tracking state, for checkpoints."""
+        return {
+            "episodes": self.episodes,
+            "streak": self.streak,
+            "stopped_episode": self.stopped_episode,
+            "q_deltas": list(self.q_deltas),
+            "q_changes": list(self.q_changes),
+            "queue_trends": list(self.queue_trends),
+            "policy_changes": list(self.policy_changes),
+            "prev_q": self._prev_q,
+            "policies": list(self._policies),
+            "q_delta_sums": list(self._q_delta_sums),
+            "queue_sums": list(self._queue_sums),
+        }
+
+    def load_state_dict(self, state: Dict[str, Any]) -> None:
+        """Restore the tracking state saved by ``state_dict``."""
+        self.episodes = state["episodes"]
+        self.streak = state["streak"]
+        self.stopped_episode = state["stopped_episode"]
+        self.q_deltas = list(state["q_deltas"])
+        self.q_changes = list(state["q_changes"])
+        self.queue_trends = list(state["queue_trends"])
+        self.policy_changes = list(state["policy_changes"])
+        self._prev_q = state["prev_q"]
+        self._policies = deque(state["policies"], maxlen=self.window + 1)
+        self._q_delta_sums = list(state["q_delta_sums"])
+        self._queue_sums = list(state["queue_sums"])
+
+    def update(self, q_values: np.ndarray, avg_total_queue: float) -> bool:
+        """Record one finished episode.
+
+        Parameters
+        ----------
+        q_values : np.ndarray
+            Q-values after the episode as a `(..., n_actions)` array
+            (copied, so a live view may be passed).
+        avg_total_queue : float
+            The episode's average total queue length.
+
+        Returns
+        -------
+        bool
+            True if training should stop.
+        """
+        self.episodes += 1
+        q_values = np.array(q_values, dtype=np.float64)
+        if self._prev_q is not None:
+            q_delta = float(np.abs(q_values - self._prev_q).max())
+            self.q_deltas.append(q_delta)
+            self._q_delta_sums.append(self._q_delta_sums[-1] + q_delta)
+        self._prev_q = q_values
+        self._policies.append(q_values.argmax(axis=-1))
+        self._queue_sums.append(self._queue_sums[-1] + avg_total_queue)
+
+        # Signals stay at infinity until a full window of history exists
+        q_change = queue_trend = np.inf
+        policy_changes = -1
+        w = self.window
+        sums = self._q_delta_sums
+        if len(sums) > w:
+            q_change = (sums[-1] - sums[-1 - w]) / w
+        sums = self._queue_sums
+        if len(sums) > 2 * w:
+            older = sums[-1 - w] - sums[-1 - 2 * w]
+            newer = sums[-1] - sums[-1 - w]
+            queue_trend = abs(newer - older) / max(abs(older), 1e-12)
+        if len(self._policies) == w + 1:
+            policy_changes = int(np.count_nonzero(self._policies[-1] != self._policies[0]))
+        self.q_changes.append(q_change)
+        self.queue_trends.append(queue_trend)
+        self.policy_changes.append(policy_changes)
+
+        converged = (
+            (self.q_tol is None or q_change <= self.q_tol)
+            and (self.queue_tol is None or queue_trend <= self.queue_tol)
+            and (self.policy_tol is None or 0 <= policy_changes <= self.policy_tol)
+        )
+        self.streak = self.streak + 1 if converged else 0
+        if self.streak >= self.patience and self.episodes >= self.min_episodes:
+            self.stopped_episode = self.episodes
+            return True
+        return False
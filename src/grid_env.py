@@ -0,0 +1,212 @@
+"""
+grid_env.py
+------------
+
+This module extends the single-intersection `TrafficEnv` to a network of
+`rows × cols` signalised intersections laid out on a grid (a single row gives
+an arterial). Every intersection has four incoming links, one per direction of
+travel, and each link holds a queue of waiting vehicles. Vehicles travel
+straight through the network: when a link gets green, up to `depart_rate`
+vehicles leave it and join the queue on the corresponding incoming link of the
+neighbouring intersection, or leave the network at the boundary. New vehicles
+enter on the boundary links following a Bernoulli process, exactly as in
+`TrafficEnv`.
+
+Key concepts:
+
+* **State** – an integer array of shape `(rows, cols, 4)` with the queue on
+  each incoming link. The last axis is the direction of travel:
+  southbound, northbound, eastbound, westbound.
+* **Actions** – an integer array of shape `(rows, cols)`. As in `TrafficEnv`,
+  `0` gives green to the north–south links of an intersection and `1` to the
+  east–west links.
+* **Reward** – negative total queue length over the whole network. Per-
+  intersection rewards are returned in `info["rewards"]`.
+
+All link state lives in flat NumPy arrays and the network topology is
+precomputed as index arrays (the intersection and phase of every link, the
+downstream link it feeds, the boundary entry links), so a step is a handful of
+array operations regardless of network size.
+
+Example
+-------
+
+```python
+from grid_env import GridTrafficEnv
+
+env = GridTrafficEnv(rows=10, cols=10, max_steps=100)
+state = env.reset()
+done = False
+while not done:
+    action = env.sample_action()
+    state, reward, done, info = env.step(action)
+```
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+SOUTHBOUND, NORTHBOUND, EASTBOUND, WESTBOUND = range(4)
+N_DIRECTIONS = 4
+
+# Phase that serves each direction of travel (0 = north–south, 1 = east–west)
+_DIRECTION_PHASE = np.array([0, 0, 1, 1])
+# Grid offset (row, col) to the next intersection along each direction
+_DIRECTION_OFFSET = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]])
+
+
+class GridTrafficEnv:
+    """A grid network of signalised intersections with array-backed link state."""
+
+    def __init__(
+        self,
+        rows: int = 3,
+        cols: int = 3,
+        max_steps: int = 60,
+        arrival_rate_ns: float = 0.5,
+        arrival_rate_ew: float = 0.5,
+        depart_rate: int = 2,
+        link_capacity: Optional[int] = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initialise the environment.
+
+        Parameters
+        ----------
+        rows, cols : int
+            Size of the intersection grid.
+        max_steps : int
+            Number of time steps per episode.
+        arrival_rate_ns : float
+            Probability of a car entering per step on each boundary link
+            travelling north or south.
+        arrival_rate_ew : float
+            Probability of a car entering per step on each boundary link
+            travelling east or west.
+        depart_rate : int
+            Number of cars that can leave a link when it has green.
+        link_capacity : int, optional
+            Maximum queue per link. When set, departures are held back if the
+            downstream link is full (spillback) and arrivals to a full boundary
+            link are dropped. Unlimited by default.
+        seed : int
+            Random seed for reproducibility.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.max_steps = max_steps
+        self.arrival_rate_ns = arrival_rate_ns
+        self.arrival_rate_ew = arrival_rate_ew
+        self.depart_rate = depart_rate
+        self.link_capacity = link_capacity
+        self.rng = np.random.default_rng(seed)
+        self.n_intersections = rows * cols
+        self.n_links = self.n_intersections * N_DIRECTIONS
+        self._build_topology()
+        self.steps = 0
+        self.queues = np.zeros(self.n_links, dtype=np.int64)
+
+    def _build_topology(self) -> None:
+        """Precompute the index arrays describing the network."""
+        links = np.arange(self.n_links)
+        node, direction = np.divmod(links, N_DIRECTIONS)
+        row, col = np.divmod(node, self.cols)
+
+        # Intersection and serving phase of every link
+        self._link_node = node
+        self._link_phase = _DIRECTION_PHASE[direction]
+
+        # Downstream link: same direction at the neighbouring intersection
+        next_row = row + _DIRECTION_OFFSET[direction, 0]
+        next_col = col + _DIRECTION_OFFSET[direction, 1]
+        inside = (next_row >= 0) & (next_row < self.rows) & (next_col >= 0) & (next_col < self.cols)
+        self._internal = links[inside]
+        self._downstream = ((next_row * self.cols + next_col) * N_DIRECTIONS + direction)[inside]
+
+        # Boundary links receive new vehicles from outside the network
+        prev_row = row - _DIRECTION_OFFSET[direction, 0]
+        prev_col = col - _DIRECTION_OFFSET[direction, 1]
+        entry = (prev_row < 0) | (prev_row >= self.rows) | (prev_col < 0) | (prev_col >= self.cols)
+        self._entry = links[entry]
+        self._entry_rate = np.where(
+            self._link_phase[entry] == 0, self.arrival_rate_ns, self.arrival_rate_ew
+        )
+
+    def reset(self) -> np.ndarray:
+        """Reset the environment to its initial state.
+
+        Returns
+        -------
+        state : np.ndarray
+            The initial queues, shape `(rows, cols, 4)`.
+        """
+        self.steps = 0
+        self.queues[:] = 0
+        return self.state
+
+    def step(self, action: np.ndarray) -> Tuple[np.ndarray, float, bool, Dict[str, object]]:
+        """Advance the whole network by one step.
+
+        Parameters
+        ----------
+        action : np.ndarray
+            Phase per intersection, shape `(rows, cols)` or
+            `(rows * cols,)`; 0 for north–south green, 1 for east–west green.
+
+        Returns
+        -------
+        next_state : np.ndarray
+            The new queues, shape `(rows, cols, 4)`.
+        reward : float
+            Negative total queue length over the network.
+        done : bool
+            True if the episode has terminated, False otherwise.
+        info : Dict[str, object]
+            `"t"` is the current time step, `"rewards"` the negative queue
+            total per intersection (shape `(rows, cols)`) and `"exited"` the
+            number of vehicles that left the network this step.
+        """
+        action = np.asarray(action).reshape(-1)
+        if action.shape != (self.n_intersections,):
+            raise ValueError(f"Expected {self.n_intersections} actions, got {action.size}")
+        if ((action != 0) & (action != 1)).any():
+            raise ValueError("Action must be 0 (NS green) or 1 (EW green)")
+
+        queues = self.queues
+        green = self._link_phase == action[self._link_node]
+        departures = np.minimum(queues, self.depart_rate) * green
+        if self.link_capacity is not None:
+            # Receiving capacity is measured before this step's departures
+            space = self.link_capacity - queues[self._downstream]
+            departures[self._internal] = np.minimum(departures[self._internal], space)
+        queues -= departures
+
+        # Route departures into the neighbouring queues; each link has at most
+        # one upstream link, so plain fancy-index addition is safe
+        moved = departures[self._internal]
+        queues[self._downstream] += moved
+        exited = int(departures.sum() - moved.sum())
+
+        # New arrivals on the boundary after departure
+        arrivals = self.rng.random(self._entry.size) < self._entry_rate
+        if self.link_capacity is not None:
+            arrivals &= queues[self._entry] < self.link_capacity
+        queues[self._entry] += arrivals
+
+        self.steps += 1
+        per_node = queues.reshape(self.rows, self.cols, N_DIRECTIONS).sum(axis=-1)
+        reward = -float(per_node.sum())
+        done = self.steps >= self.max_steps
+        info = {"t": self.steps, "rewards": -per_node, "exited": exited}
+        return self.state, reward, done, info
+
+    @property
+    def state(self) -> np.ndarray:
+        """Return a copy of the current queues, shape `(rows, cols, 4)`."""
+        return self.queues.reshape(self.rows, self.cols, N_DIRECTIONS).copy()
+
+    def sample_action(self) -> np.ndarray:
+        """Return a random phase for every intersection."""
+        return self.rng.integers(0, 2, size=(self.rows, self.cols))
@@ -0,0 +1,210 @@
+"""
+gym_traffic_env.py
+-------------------
+
+Gymnasium bindings for `TrafficEnv`, so that gymnasium tooling (wrappers,
+`SyncVectorEnv`/`AsyncVectorEnv`, `gymnasium.make_vec`, training libraries
+built on the gymnasium API) can drive the intersection directly.
+
+* ``TrafficGymEnv`` – a `gymnasium.Env` around `TrafficEnv` with an
+  `int64` `Box` observation `[ns_queue, ew_queue]`, a `Discrete(2)` action
+  space and the five-tuple `step` API. Episodes only end at `max_steps`,
+  which is reported as `truncated` (never `terminated`).
+* ``TrafficVectorEnv`` – a native `gymnasium.vector.VectorEnv` around
+  `VectorTrafficEnv` that steps every sub-environment as arrays instead of
+  looping over `num_envs` single environments. Finished sub-environments are
+  reset within the same step (`AutoresetMode.SAME_STEP`); the last
+  observation of the finished episode is in `info["final_obs"]`, laid out as
+  `SyncVectorEnv` lays it out.
+
+Both are registered under ``ENV_ID`` when this module is imported, with the
+native implementation as the vector entry point. Sub-environment `i` of
+``TrafficVectorEnv`` reset with seed `s` follows the same trajectory as
+``TrafficGymEnv`` reset with seed `s + i`, which is also what
+`SyncVectorEnv.reset(seed=s)` does, so both vectorisation modes agree.
+
+Example
+-------
+
+```python
+import gymnasium as gym
+import gym_traffic_env  # registers TrafficEnv-v0
+
+env = gym.make("TrafficEnv-v0", max_steps=100)
+obs, info = env.reset(seed=0)
+obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
+
+envs = gym.make_vec("TrafficEnv-v0", num_envs=256)   # native vector implementation
+obs, info = envs.reset(seed=0)
+obs, rewards, terminated, truncated, info = envs.step(envs.action_space.sample())
+```
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from traffic_env import TrafficEnv, VectorTrafficEnv
+
+ENV_ID = "TrafficEnv-v0"
+
+
+def _observation_space(max_steps: int) -> spaces.Box:
+    # At most one car arrives per approach and step, so no queue exceeds max_steps
+    return spaces.Box(low=0, high=max_steps, shape=(2,), dtype=np.int64)
+
+
+class TrafficGymEnv(gym.Env):
+    """`TrafficEnv` with the gymnasium `Env` API."""
+
+    metadata: Dict[str, Any] = {"render_modes": []}
+
+    def __init__(
+        self,
+        max_steps: int = 60,
+        arrival_rate_ns: float = 0.5,
+        arrival_rate_ew: float = 0.5,
+        depart_rate: int = 2,
+        seed: int = 0,
+        presample_arrivals: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_steps, arrival_rate_ns, arrival_rate_ew, depart_rate, presample_arrivals
+            As for `TrafficEnv`.
+        seed : int
+            Seed used until `reset` is called with a seed.
+        """
+        self._env_kwargs = dict(
+            max_steps=max_steps,
+            arrival_rate_ns=arrival_rate_ns,
+            arrival_rate_ew=arrival_rate_ew,
+            depart_rate=depart_rate,
+            presample_arrivals=presample_arrivals,
+        )
+        self.env = TrafficEnv(seed=seed, **self._env_kwargs)
+        self.observation_space = _observation_space(max_steps)
+        self.action_space = spaces.Discrete(2)
+
+    def reset(
+        self, *, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Start a new episode, re-seeding the arrivals if `seed` is given."""
+        super().reset(seed=seed)
+        if seed is not None:
+            self.env = TrafficEnv(seed=seed, **self._env_kwargs)
+        return np.array(self.env.reset(), dtype=np.int64), {}
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
+        """Advance one step; the time limit is reported as `truncated`."""
+        state, reward, done, info = self.env.step(int(action))
+        return np.array(state, dtype=np.int64), float(reward), False, done, info
+
+
+class TrafficVectorEnv(VectorEnv):
+    """`VectorTrafficEnv` with the gymnasium `VectorEnv` API."""
+
+    metadata: Dict[str, Any] = {"render_modes": [], "autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(
+        self,
+        num_envs: int,
+        max_steps: int = 60,
+        arrival_rate_ns: float = 0.5,
+        arrival_rate_ew: float = 0.5,
+        depart_rate: int = 2,
+        seed: int = 0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        num_envs, max_steps, arrival_rate_ns, arrival_rate_ew, depart_rate
+            As for `VectorTrafficEnv`.
+        seed : int
+            Base seed used until `reset` is called with a seed.
+        """
+        self._env_kwargs = dict(
+            max_steps=max_steps,
+            arrival_rate_ns=arrival_rate_ns,
+            arrival_rate_ew=arrival_rate_ew,
+            depart_rate=depart_rate,
+        )
+        self.env = VectorTrafficEnv(num_envs, seed=seed, **self._env_kwargs)
+        self.num_envs = num_envs
+        self.single_observation_space = _observation_space(max_steps)
+        self.single_action_space = spaces.Discrete(2)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+    def reset(
+        self,
+        *,
+        seed: Optional[Union[int, Sequence[Optional[int]]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Reset every sub-environment.
+
+        Parameters
+        ----------
+        seed : int or Sequence[int], optional
+            Base seed; sub-environment `i` uses `seed + i`. A sequence of
+            per-environment seeds is accepted only in that form
+            (`[s, s + 1, ...]`), since the sub-environments share one base
+            seed.
+        options : Dict[str, Any], optional
+            Unused.
+        """
+        if seed is not None and not isinstance(seed, (int, np.integer)):
+            seeds = list(seed)
+            if len(seeds) != self.num_envs or seeds != list(range(seeds[0], seeds[0] + self.num_envs)):
+                raise ValueError("Per-environment seeds must be consecutive integers [s, s + 1, ...]")
+            seed = seeds[0]
+        super().reset(seed=seed)
+        if seed is not None:
+            self.env = VectorTrafficEnv(self.num_envs, seed=int(seed), **self._env_kwargs)
+        return self.env.reset(), {}
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Advance every sub-environment by one step.
+
+        Sub-environments that reach `max_steps` are truncated and reset in
+        the same step: their row of the returned observations is the first
+        observation of the next episode, and `info["final_obs"]` (an object
+        array, masked by `info["_final_obs"]`) holds the last observation of
+        the finished one.
+        """
+        obs, rewards, dones, step_info = self.env.step(np.asarray(actions))
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        info: Dict[str, Any] = {}
+        if not dones.all():
+            info["t"] = np.where(dones, 0, step_info["t"])
+            info["_t"] = ~dones
+        if dones.any():
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            for i in np.flatnonzero(dones):
+                final_obs[i] = step_info["final_state"][i]
+            info["final_obs"] = final_obs
+            info["_final_obs"] = dones
+            info["final_info"] = {"t": np.where(dones, step_info["t"], 0), "_t": dones}
+            info["_final_info"] = dones
+        return obs, rewards, terminated, dones, info
+
+
+def register_envs() -> None:
+    """Register ``ENV_ID`` with gymnasium (a no-op if already registered)."""
+    if ENV_ID not in gym.registry:
+        gym.register(
+            ENV_ID,
+            entry_point=f"{__name__}:TrafficGymEnv",
+            vector_entry_point=f"{__name__}:TrafficVectorEnv",
+        )
+
+
+register_envs()
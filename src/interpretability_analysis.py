@@ -26,6 +26,8 @@ This is a template only.  To run it you must install the `shap` package and
 provide a trained agent with a `.predict()` or `.q_network` method.
 """
 
+from collections.abc import Mapping
+
 import numpy as np
 import shap
 import matplotlib.pyplot as plt
@@ -80,9 +82,20 @@ def plot_q_heatmap(q_table):
 
     Parameters
     ----------
-    q_table : np.ndarray
-        Q-table with shape (n_states_dim1, n_states_dim2).
+    q_table : np.ndarray or Mapping
+        Q-table with shape (n_states_dim1, n_states_dim2), or a tabular
+        Q-table mapping ``(ns_queue, ew_queue)`` states to action values
+        (the ``dict`` or ``DenseQTable`` returned by ``train_q_learning``).
+        Mappings are plotted as the greedy state value ``max_a Q(s, a)``,
+        with unvisited states left blank.
+
+    Raises
+    ------
+    ValueError
+        If ``q_table`` is a mapping with no states.
     """
+    if isinstance(q_table, Mapping):
+        q_table = _state_value_grid(q_table)
     fig, ax = plt.subplots(figsize=(6, 5))
     c = ax.imshow(q_table, cmap='viridis')
     ax.set_xlabel('State dimension 1')
@@ -91,6 +104,18 @@ def plot_q_heatmap(q_table):
     plt.show()
 
 
+def _state_value_grid(q_table):
+    """Convert a state -> action-values mapping into a 2-D grid of max Q."""
+    states = list(q_table)
+    if not states:
+        raise ValueError("Q-table has no states to plot; train it for at least one step first")
+    shape = (max(ns for ns, _ in states) + 1, max(ew for _, ew in states) + 1)
+    grid = np.full(shape, np.nan)
+    for (ns, ew), values in q_table.items():
+        grid[ns, ew] = np.max(values)
+    return grid
+
+
 __all__ = [
     "compute_shap_values",
     "plot_shap_summary",
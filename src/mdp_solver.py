@@ -0,0 +1,296 @@
+"""
+mdp_solver.py
+--------------
+
+This module solves the single-intersection `TrafficEnv` exactly. The
+environment's dynamics are fully known – Bernoulli arrivals with rates
+`arrival_rate_ns`/`arrival_rate_ew` and a deterministic `depart_rate` on the
+green approach – so instead of sampling episodes we can write down the
+transition model on the clipped state space used by ``discretise_state`` and
+solve it with dynamic programming. The result is a ground-truth optimal
+Q-table to compare ``train_q_learning`` against.
+
+Key functions:
+
+* ``build_traffic_mdp`` – builds the sparse transition tensor. Each
+  state-action pair has at most four successors (arrival or not on each
+  approach), so the model is stored as `(S, A, 4)` successor indices and
+  probabilities plus the expected reward for each pair.
+* ``value_iteration`` – vectorised Bellman backups until the value function
+  changes by less than a tolerance.
+* ``policy_iteration`` – exact policy evaluation with a sparse linear solve
+  followed by greedy improvement; usually converges in a handful of
+  iterations.
+* ``policy_agreement`` – fraction of states on which a learned Q-table picks
+  an optimal action.
+
+Q-values are returned with shape `(max_queue + 1, max_queue + 1, 2)`, the
+same layout as ``DenseQTable.array``.
+
+Example
+-------
+
+```python
+from traffic_env import TrafficEnv
+from mdp_solver import build_traffic_mdp, policy_iteration
+
+mdp = build_traffic_mdp(TrafficEnv(arrival_rate_ns=0.6), max_queue=10)
+q_values, policy, iterations = policy_iteration(mdp, gamma=0.95)
+```
+"""
+
+import warnings
+from typing import Mapping, NamedTuple, Tuple
+
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse.linalg import spsolve
+
+from traffic_env import TrafficEnv
+
+N_ACTIONS = 2
+
+
+class TrafficMDP(NamedTuple):
+    """Tabular model of `TrafficEnv` on a clipped state space.
+
+    States are flattened as ``ns * (max_queue + 1) + ew``.
+
+    Attributes
+    ----------
+    next_states : np.ndarray
+        Successor state indices, shape `(S, A, 4)`.
+    probs : np.ndarray
+        Probability of each successor, shape `(S, A, 4)`.
+    rewards : np.ndarray
+        Expected immediate reward for each state-action pair, shape `(S, A)`.
+    max_queue : int
+        Queue length at which states are clipped.
+    """
+
+    next_states: np.ndarray
+    probs: np.ndarray
+    rewards: np.ndarray
+    max_queue: int
+
+
+def build_traffic_mdp(env: TrafficEnv, max_queue: int = 10) -> TrafficMDP:
+    """Build the transition model of `env` on the clipped state space.
+
+    Queues are clipped at `max_queue` exactly as ``discretise_state`` does,
+    so state `max_queue` stands for "`max_queue` or more" and is treated as
+    holding exactly `max_queue` cars. The reward is the negative total of the
+    clipped next-state queues.
+
+    Parameters
+    ----------
+    env : TrafficEnv
+        Environment providing `arrival_rate_ns`, `arrival_rate_ew` and
+        `depart_rate`.
+    max_queue : int
+        Maximum queue length represented on each approach.
+
+    Returns
+    -------
+    TrafficMDP
+        The sparse transition model.
+    """
+    width = max_queue + 1
+    ns, ew = np.divmod(np.arange(width * width), width)
+
+    # Departures depend on the action: (S, A)
+    ns_after = np.stack([np.maximum(ns - env.depart_rate, 0), ns], axis=1)
+    ew_after = np.stack([ew, np.maximum(ew - env.depart_rate, 0)], axis=1)
+
+    # Arrival outcomes in the order (none, ns only, ew only, both)
+    ns_arrive = np.array([0, 1, 0, 1])
+    ew_arrive = np.array([0, 0, 1, 1])
+    p_ns, p_ew = env.arrival_rate_ns, env.arrival_rate_ew
+    outcome_probs = np.where(ns_arrive, p_ns, 1 - p_ns) * np.where(ew_arrive, p_ew, 1 - p_ew)
+
+    next_ns = np.minimum(ns_after[..., None] + ns_arrive, max_queue)
+    next_ew = np.minimum(ew_after[..., None] + ew_arrive, max_queue)
+    next_states = next_ns * width + next_ew
+    probs = np.broadcast_to(outcome_probs, next_states.shape).copy()
+    rewards = -((next_ns + next_ew) * probs).sum(axis=-1)
+    return TrafficMDP(next_states, probs, rewards, max_queue)
+
+
+def _backup(mdp: TrafficMDP, values: np.ndarray, gamma: float) -> np.ndarray:
+    """Return Q-values of shape `(S, A)` for a state-value vector."""
+    return mdp.rewards + gamma * (mdp.probs * values[mdp.next_states]).sum(axis=-1)
+
+
+def _as_grid(mdp: TrafficMDP, q_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Reshape flat Q-values into the `DenseQTable` layout and derive the policy."""
+    width = mdp.max_queue + 1
+    q_grid = q_values.reshape(width, width, N_ACTIONS)
+    return q_grid, q_grid.argmax(axis=-1)
+
+
+def transition_matrix(mdp: TrafficMDP, policy: np.ndarray) -> sparse.csr_matrix:
+    """Return the `(S, S)` sparse transition matrix under a deterministic policy.
+
+    Parameters
+    ----------
+    mdp : TrafficMDP
+        The transition model.
+    policy : np.ndarray
+        Action per state, either flat `(S,)` or in grid shape.
+    """
+    policy = np.asarray(policy).reshape(-1)
+    n_states = policy.size
+    rows = np.repeat(np.arange(n_states), mdp.next_states.shape[-1])
+    cols = mdp.next_states[np.arange(n_states), policy].reshape(-1)
+    data = mdp.probs[np.arange(n_states), policy].reshape(-1)
+    # Duplicate (row, col) entries from clipping are summed by the constructor
+    return sparse.csr_matrix((data, (rows, cols)), shape=(n_states, n_states))
+
+
+def value_iteration(
+    mdp: TrafficMDP,
+    gamma: float = 0.95,
+    tol: float = 1e-8,
+    max_iter: int = 10_000,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Solve the MDP with vectorised value iteration.
+
+    Parameters
+    ----------
+    mdp : TrafficMDP
+        The transition model from ``build_traffic_mdp``.
+    gamma : float
+        Discount factor, as used by ``train_q_learning``.
+    tol : float
+        Stop once the largest change in state value falls below this.
+    max_iter : int
+        Maximum number of Bellman backups (at least 1). If the tolerance is
+        not reached by then, the unconverged result is returned and a
+        `RuntimeWarning` is issued.
+
+    Returns
+    -------
+    q_values : np.ndarray
+        Optimal Q-values of shape `(max_queue + 1, max_queue + 1, 2)`.
+    policy : np.ndarray
+        Greedy action per state, shape `(max_queue + 1, max_queue + 1)`.
+    iterations : int
+        Number of backups performed.
+    """
+    if max_iter < 1:
+        raise ValueError("max_iter must be at least 1")
+    values = np.zeros(mdp.rewards.shape[0])
+    for iteration in range(1, max_iter + 1):
+        q_values = _backup(mdp, values, gamma)
+        new_values = q_values.max(axis=1)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tol:
+            break
+    else:
+        warnings.warn(f"value_iteration did not converge in {max_iter} iterations "
+                      f"(last change {delta:.3g} >= tol {tol:.3g})", RuntimeWarning, stacklevel=2)
+    q_grid, policy = _as_grid(mdp, _backup(mdp, values, gamma))
+    return q_grid, policy, iteration
+
+
+def policy_iteration(
+    mdp: TrafficMDP,
+    gamma: float = 0.95,
+    max_iter: int = 1_000,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Solve the MDP with policy iteration.
+
+    Each iteration evaluates the current policy exactly by solving
+    ``(I - gamma * P_pi) V = R_pi`` with a sparse solver, then improves the
+    policy greedily. The current action is kept on ties so the loop always
+    terminates.
+
+    Parameters
+    ----------
+    mdp : TrafficMDP
+        The transition model from ``build_traffic_mdp``.
+    gamma : float
+        Discount factor; must be below 1 for the linear system to be
+        well-posed.
+    max_iter : int
+        Maximum number of policy evaluations (at least 1). If the policy is
+        still changing after the last one, that evaluated policy and its
+        Q-values are returned unconverged and a `RuntimeWarning` is issued.
+
+    Returns
+    -------
+    q_values : np.ndarray
+        Optimal Q-values of shape `(max_queue + 1, max_queue + 1, 2)`.
+    policy : np.ndarray
+        Optimal action per state, shape `(max_queue + 1, max_queue + 1)`.
+    iterations : int
+        Number of policy evaluations performed.
+    """
+    n_states = mdp.rewards.shape[0]
+    states = np.arange(n_states)
+    identity = sparse.identity(n_states, format="csr")
+    if max_iter < 1:
+        raise ValueError("max_iter must be at least 1")
+    policy = np.zeros(n_states, dtype=np.int64)
+    for iteration in range(1, max_iter + 1):
+        system = identity - gamma * transition_matrix(mdp, policy)
+        values = spsolve(system.tocsc(), mdp.rewards[states, policy])
+        q_values = _backup(mdp, values, gamma)
+        improved = q_values.argmax(axis=1)
+        # Only switch when strictly better to avoid cycling between ties
+        keep = q_values[states, improved] <= q_values[states, policy] + 1e-12
+        improved[keep] = policy[keep]
+        if np.array_equal(improved, policy):
+            break
+        if iteration == max_iter:
+            # Keep the policy that q_values were evaluated for
+            warnings.warn(f"policy_iteration did not converge in {max_iter} iterations",
+                          RuntimeWarning, stacklevel=2)
+            break
+        policy = improved
+    q_grid, _ = _as_grid(mdp, q_values)
+    return q_grid, policy.reshape(q_grid.shape[:2]), iteration
+
+
+def policy_agreement(
+    q_table: Mapping[Tuple[int, int], np.ndarray],
+    optimal_q: np.ndarray,
+    atol: float = 1e-9,
+) -> float:
+    """Fraction of states where a learned Q-table's greedy action is optimal.
+
+    An action counts as optimal if its optimal Q-value is within `atol` of
+    the best one, so states where both phases are equally good always agree.
+
+    Parameters
+    ----------
+    q_table : Mapping[Tuple[int, int], np.ndarray]
+        Learned Q-table, e.g. from ``train_q_learning``.
+    optimal_q : np.ndarray
+        Q-values from ``value_iteration`` or ``policy_iteration``.
+    atol : float
+        Tolerance for treating actions as equally good.
+
+    Returns
+    -------
+    float
+        Agreement over the states present in `q_table`.
+    """
+    if len(q_table) == 0:
+        return 0.0
+    agree = 0
+    for (ns, ew), values in q_table.items():
+        best = optimal_q[ns, ew]
+        agree += best[int(np.argmax(values))] >= best.max() - atol
+    return agree / len(q_table)
+
+
+__all__ = [
+    "TrafficMDP",
+    "build_traffic_mdp",
+    "transition_matrix",
+    "value_iteration",
+    "policy_iteration",
+    "policy_agreement",
+]
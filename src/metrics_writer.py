@@ -0,0 +1,128 @@
+"""
+metrics_writer.py
+------------------
+
+A lightweight sink for streaming training metrics to disk. Long runs are
+easier to watch (and to abandon when they go wrong) when their per-episode
+metrics appear in a file as training proceeds instead of in a list returned
+at the end.
+
+``MetricsWriter`` appends one record per call to a CSV or JSON-lines file.
+Records are buffered in memory and written in batches, every
+`buffer_size` records or every `flush_interval` seconds, whichever comes
+first, so the cost per episode stays at a few microseconds while the file
+lags the run by at most a few seconds. The writer is callable, so it can be
+passed directly as the `callback` of ``train_q_learning``.
+
+Example
+-------
+
+```python
+from metrics_writer import MetricsWriter
+from q_learning_agent import train_q_learning
+
+with MetricsWriter("logs/q_learning.csv") as writer:
+    q_table, avg_total_queues = train_q_learning(env, episodes=10_000, callback=writer)
+```
+
+`tail -f logs/q_learning.csv` then follows the run.
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class MetricsWriter:
+    """Append metric records to a CSV or JSON-lines file with buffered writes."""
+
+    def __init__(
+        self,
+        path: str,
+        fmt: Optional[str] = None,
+        buffer_size: int = 100,
+        flush_interval: float = 5.0,
+        fields: Optional[Sequence[str]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            Output file; parent directories are created. Existing files are
+            appended to (a CSV header is only written to an empty file).
+        fmt : str, optional
+            ``"csv"`` or ``"jsonl"``; inferred from the file extension if
+            omitted (``.csv``, otherwise JSON lines).
+        buffer_size : int
+            Records held in memory before they are written.
+        flush_interval : float
+            Seconds after which buffered records are written even if the
+            buffer is not full.
+        fields : Sequence[str], optional
+            CSV columns; defaults to the keys of the first record. Keys not
+            listed are ignored.
+        """
+        if fmt is None:
+            fmt = "csv" if path.endswith(".csv") else "jsonl"
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown metrics format {fmt!r}; expected 'csv' or 'jsonl'")
+        self.path = path
+        self.fmt = fmt
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.fields: Optional[List[str]] = list(fields) if fields is not None else None
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._write_header = fmt == "csv" and self._file.tell() == 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Buffer one record, writing the buffer out when it is due."""
+        self._buffer.append(record)
+        if (len(self._buffer) >= self.buffer_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def __call__(self, record: Dict[str, Any]) -> None:
+        """Alias for ``write`` so the writer can be used as a callback."""
+        self.write(record)
+
+    def flush(self) -> None:
+        """Write all buffered records and flush the file."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self.fmt == "jsonl":
+            text = "".join(json.dumps(record, default=float) + "\n" for record in self._buffer)
+        else:
+            if self.fields is None:
+                self.fields = list(self._buffer[0])
+            out = io.StringIO()
+            writer = csv.DictWriter(out, fieldnames=self.fields, extrasaction="ignore")
+            if self._write_header:
+                writer.writeheader()
+                self._write_header = False
+            writer.writerows(self._buffer)
+            text = out.getvalue()
+        self._file.write(text)
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Write any remaining records and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "MetricsWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
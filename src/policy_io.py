@@ -0,0 +1,276 @@
+"""
+policy_io.py
+-------------
+
+Saving and loading learned Q-tables and greedy policies.
+
+Models are stored as a plain `.npy` array plus a small JSON sidecar
+(`<path>.json`) describing how to interpret it: the kind of file
+(`"q_table"` or `"policy"`), `max_queue`, the number of actions, the
+parameters of the environment it was trained on, and any user metadata.
+Compared with pickling a ``dict`` this has two advantages for controller
+processes:
+
+* **Instant start-up** – ``load_q_table`` and ``load_policy`` open the
+  array with `np.load(mmap_mode="r")`, so nothing is parsed or copied;
+  pages are read from disk when first touched.
+* **One physical copy** – every process that maps the same file shares the
+  operating system's page cache, so a thousand workers serving the same
+  policy use the memory of one.
+
+Each file is written atomically (to a temporary file in the same directory
+followed by `os.replace`), so a reader never sees a half-written array or
+sidecar. The pair is not replaced atomically, though: the array is replaced
+before the sidecar, so a reader racing a writer can pick up the new array
+with the old sidecar. The loaders check the sidecar's recorded shape and
+dtype against the array and raise ``ValueError`` on a mismatch; a
+same-shape overwrite can still pair a new array with an old sidecar, so to
+update a model that is being served, save it under a new path and switch
+readers over.
+
+Example
+-------
+
+```python
+from policy_io import load_policy, load_q_table, save_policy, save_q_table
+
+q_table, _ = train_q_learning(env, episodes=500, dense=True)
+save_q_table("models/q_table.npy", q_table, env=env)
+save_policy("models/policy.npy", q_table, env=env)
+
+policy = load_policy("models/policy.npy")      # memory-mapped, read-only
+action = policy((ns_queue, ew_queue))
+
+# Continue training from a saved table: a copy-on-write map is writable
+q_table = load_q_table("models/q_table.npy", writable=True)
+```
+"""
+
+import base64
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from checkpoint import atomic_write
+from q_learning_agent import DenseQTable
+from rollout_kernel import greedy_policy
+
+FORMAT_VERSION = 1
+
+
+def env_params(env: Any) -> Dict[str, Any]:
+    """Return the constructor parameters of a `TrafficEnv`-like environment."""
+    names = ("max_steps", "arrival_rate_ns", "arrival_rate_ew", "depart_rate")
+    return {name: getattr(env, name) for name in names if hasattr(env, name)}
+
+
+def _save(path: str, array: np.ndarray, header: Dict[str, Any]) -> None:
+    array = np.ascontiguousarray(array)
+    header = dict(header, format_version=FORMAT_VERSION, dtype=array.dtype.str,
+                  shape=list(array.shape))
+    atomic_write(path, lambda f: np.save(f, array, allow_pickle=False))
+    text = json.dumps(header, indent=2, default=float)
+    atomic_write(path + ".json", lambda f: f.write(text), mode="w")
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Read the JSON sidecar of a saved Q-table or policy."""
+    with open(path + ".json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_array(path: str, header: Dict[str, Any], mmap: bool, writable: bool = False) -> np.ndarray:
+    """Load the array of a saved model and check it against its sidecar."""
+    mmap_mode = ("c" if writable else "r") if mmap else None
+    array = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+    if list(array.shape) != header.get("shape") or array.dtype.str != header.get("dtype"):
+        raise ValueError(
+            f"{path} holds an array of shape {array.shape} and dtype {array.dtype.str}, but its "
+            f"sidecar records {header.get('shape')} and {header.get('dtype')}; the model may "
+            f"have been overwritten while loading"
+        )
+    return array
+
+
+def _as_dense(q_table: Union[Mapping, DenseQTable, np.ndarray], max_queue: Optional[int]) -> DenseQTable:
+    if isinstance(q_table, DenseQTable):
+        return q_table
+    if isinstance(q_table, np.ndarray):
+        return DenseQTable(q_table.shape[0] - 1, q_table.shape[-1], array=q_table)
+    if max_queue is None:
+        max_queue = max((max(state) for state in q_table), default=0)
+    return DenseQTable.from_dict(q_table, max_queue)
+
+
+def save_q_table(
+    path: str,
+    q_table: Union[Mapping, DenseQTable, np.ndarray],
+    max_queue: Optional[int] = None,
+    env: Any = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Save a Q-table as a `.npy` array with a JSON sidecar.
+
+    Parameters
+    ----------
+    path : str
+        Destination `.npy` file; the sidecar is written to `path + ".json"`.
+    q_table : dict, DenseQTable or np.ndarray
+        The Q-table as returned by ``train_q_learning`` or its dense array
+        of shape `(max_queue + 1, max_queue + 1, n_actions)`.
+    max_queue : int, optional
+        Discretisation cap used in training; needed for ``dict`` tables
+        whose largest state is below the cap (inferred otherwise).
+    env : TrafficEnv, optional
+        Environment the table was trained on; its parameters are recorded.
+    metadata : Dict[str, Any], optional
+        Extra JSON-serialisable information to store (e.g. hyper-parameters).
+    """
+    dense = _as_dense(q_table, max_queue)
+    header = {
+        "kind": "q_table",
+        "max_queue": dense.max_queue,
+        "n_actions": dense.n_actions,
+        "visited": base64.b64encode(np.packbits(dense.visited)).decode("ascii"),
+        "env": env_params(env) if env is not None else None,
+        "metadata": metadata or {},
+    }
+    _save(path, dense.array, header)
+
+
+def load_q_table(path: str, mmap: bool = True, writable: bool = False) -> DenseQTable:
+    """Load a Q-table saved by ``save_q_table``.
+
+    Parameters
+    ----------
+    path : str
+        The `.npy` file.
+    mmap : bool
+        Memory-map the array instead of reading it into memory.
+    writable : bool
+        Map the array copy-on-write so the table can be updated in place,
+        e.g. to continue learning from it. Changes stay private to this
+        process and are never written to the file. Without it a
+        memory-mapped table is read-only.
+
+    Returns
+    -------
+    DenseQTable
+        The table; `array` is a read-only memory map when `mmap` is True
+        and `writable` is False.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a Q-table or the array does not match its sidecar.
+    """
+    header = read_header(path)
+    if header.get("kind") != "q_table":
+        raise ValueError(f"{path} does not contain a Q-table (kind={header.get('kind')!r})")
+    array = _load_array(path, header, mmap, writable)
+    width = header["max_queue"] + 1
+    bits = np.frombuffer(base64.b64decode(header["visited"]), dtype=np.uint8)
+    visited = np.unpackbits(bits, count=width * width).astype(bool).reshape(width, width)
+    return DenseQTable(header["max_queue"], header["n_actions"], array=array, visited=visited)
+
+
+class TabularPolicy:
+    """Greedy lookup-table policy over discretised queue lengths.
+
+    Calling the policy with a state returns its action; the extra
+    `(phase, elapsed_green)` arguments are accepted and ignored so it can be
+    used wherever a baseline controller step function is expected (e.g.
+    ``baselines.evaluate_baseline``).
+    """
+
+    def __init__(self, table: np.ndarray, header: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Parameters
+        ----------
+        table : np.ndarray
+            Actions of shape `(max_queue + 1, max_queue + 1)`.
+        header : Dict[str, Any], optional
+            The sidecar contents (`env`, `metadata`, ...).
+        """
+        self.table = table
+        self.max_queue = table.shape[0] - 1
+        self.header = header or {}
+
+    def __call__(self, state: Tuple[int, int], phase: int = 0, elapsed_green: int = 0) -> int:
+        ns, ew = state
+        m = self.max_queue
+        return int(self.table[min(ns, m), min(ew, m)])
+
+    def act_batch(self, states: np.ndarray, *unused: Any) -> np.ndarray:
+        """Return the actions for an `(N, 2)` array of states."""
+        cells = np.minimum(states, self.max_queue)
+        return self.table[cells[:, 0], cells[:, 1]].astype(np.int64)
+
+
+def save_policy(
+    path: str,
+    q_table_or_policy: Union[Mapping, DenseQTable, np.ndarray],
+    max_queue: Optional[int] = None,
+    env: Any = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Save a greedy policy as an int8 `.npy` array with a JSON sidecar.
+
+    Parameters
+    ----------
+    path : str
+        Destination `.npy` file.
+    q_table_or_policy : dict, DenseQTable or np.ndarray
+        A Q-table (the greedy policy is derived with ties broken towards
+        action 0) or a ready `(max_queue + 1, max_queue + 1)` policy array.
+    max_queue, env, metadata
+        As for ``save_q_table``.
+    """
+    if isinstance(q_table_or_policy, np.ndarray) and q_table_or_policy.ndim == 2:
+        policy = q_table_or_policy.astype(np.int8)
+        n_actions = int(policy.max()) + 1 if policy.size else 0
+    else:
+        dense = _as_dense(q_table_or_policy, max_queue)
+        policy = greedy_policy(dense.array)
+        n_actions = dense.n_actions
+    header = {
+        "kind": "policy",
+        "max_queue": policy.shape[0] - 1,
+        "n_actions": n_actions,
+        "env": env_params(env) if env is not None else None,
+        "metadata": metadata or {},
+    }
+    _save(path, policy, header)
+
+
+def load_policy(path: str, mmap: bool = True) -> TabularPolicy:
+    """Load a policy saved by ``save_policy`` (or derive one from a saved Q-table).
+
+    Parameters
+    ----------
+    path : str
+        The `.npy` file.
+    mmap : bool
+        Memory-map the array read-only instead of reading it into memory.
+
+    Returns
+    -------
+    TabularPolicy
+        The policy; with `mmap` its table is shared through the page cache
+        by every process that loads the same file.
+
+    Raises
+    ------
+    ValueError
+        If the file holds neither a policy nor a Q-table, or the array does
+        not match its sidecar.
+    """
+    header = read_header(path)
+    array = _load_array(path, header, mmap)
+    if header.get("kind") == "q_table":
+        return TabularPolicy(greedy_policy(array), header)
+    if header.get("kind") != "policy":
+        raise ValueError(f"{path} does not contain a policy (kind={header.get('kind')!r})")
+    return TabularPolicy(array, header)
@@ -0,0 +1,269 @@
+"""
+prioritized_replay.py
+----------------------
+
+This module adds proportional prioritized experience replay (Schaul et al.,
+2016) on top of ``ReplayBuffer``. Transitions are sampled with probability
+proportional to `priority ** alpha`, where the priority is the magnitude of
+the last TD error, and importance-sampling weights correct the resulting bias.
+
+Both operations need O(log N) data structures:
+
+* ``SumTree`` – a binary tree whose leaves are the priorities and whose
+  internal nodes hold the sum of their children. Sampling walks from the root
+  to the leaf whose prefix-sum interval contains a uniform draw.
+* ``MinTree`` – the same layout holding minima, used to normalise the
+  importance-sampling weights by the largest possible weight.
+
+The trees are stored as one flat NumPy array in heap order (node `k` has
+children `2k` and `2k + 1`, the `capacity` leaves occupy the second half), so
+memory is `2 * capacity` floats per tree with no padding to a power of two.
+Batched operations never walk the tree element by element: ``update`` writes
+all leaves at once and then recomputes the affected parents one level at a
+time, and ``find_prefix`` descends for the whole batch simultaneously. Each
+therefore costs `O(log N)` NumPy calls regardless of the batch size.
+
+Example
+-------
+
+```python
+buffer = PrioritizedReplayBuffer(capacity=1_000_000, state_shape=(2,), seed=0)
+buffer.add(state, action, reward, next_state, done)
+batch, weights, indices = buffer.sample(256, beta=0.4)
+buffer.update_priorities(indices, td_errors)
+```
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from replay_buffer import Batch, ReplayBuffer
+
+
+class SumTree:
+    """Flat-array sum tree over `capacity` non-negative leaf values."""
+
+    _fill = 0.0
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.tree = np.full(2 * capacity, self._fill)
+
+    def _combine(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        return left + right
+
+    def update(self, indices: np.ndarray, values: np.ndarray) -> None:
+        """Set leaf values and refresh their ancestors.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            Leaf indices in `[0, capacity)`. With duplicates the last value
+            wins.
+        values : np.ndarray
+            New leaf values, broadcastable to `indices`.
+        """
+        nodes = np.asarray(indices, dtype=np.intp) + self.capacity
+        self.tree[nodes] = values
+        if nodes.size * 8 > self.capacity:
+            self._rebuild()
+            return
+        # Leaves may sit on two different depths, so parents are refreshed
+        # until the root; a node's last refresh always follows its children's
+        nodes = np.unique(nodes >> 1)
+        while nodes.size:
+            if nodes[0] == 0:
+                nodes = nodes[1:]
+                continue
+            self.tree[nodes] = self._combine(self.tree[2 * nodes], self.tree[2 * nodes + 1])
+            # Halving keeps the array sorted, so duplicates are adjacent
+            nodes = nodes >> 1
+            keep = np.empty(nodes.size, dtype=bool)
+            keep[0] = True
+            np.not_equal(nodes[1:], nodes[:-1], out=keep[1:])
+            nodes = nodes[keep]
+
+    def _rebuild(self) -> None:
+        """Recompute every internal node, one level at a time from the bottom."""
+        n = self.capacity
+        for depth in range((n - 1).bit_length() - 1, -1, -1):
+            lo, hi = 1 << depth, min(2 << depth, n)
+            self.tree[lo:hi] = self._combine(
+                self.tree[2 * lo:2 * hi:2], self.tree[2 * lo + 1:2 * hi:2]
+            )
+
+    def __getitem__(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[np.asarray(indices) + self.capacity]
+
+    @property
+    def root(self) -> float:
+        """Aggregate over all leaves (the sum, or the minimum for `MinTree`)."""
+        return float(self.tree[1]) if self.capacity > 1 else float(self.tree[self.capacity])
+
+    def total(self) -> float:
+        """Sum of all leaf values."""
+        return self.root
+
+    def find_prefix(self, values: np.ndarray) -> np.ndarray:
+        """Return, for each value, the leaf whose prefix-sum interval contains it.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Query values in `[0, total())`.
+
+        Returns
+        -------
+        np.ndarray
+            Leaf indices in `[0, capacity)`.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(values.shape, dtype=np.intp)
+        # Every node above depth floor(log2(capacity)) is internal, so those
+        # levels need no masking; at most one more level remains after them
+        for _ in range(self.capacity.bit_length() - 1):
+            nodes = self._descend(nodes, values)
+        internal = np.flatnonzero(nodes < self.capacity)
+        if internal.size:
+            sub_values = values[internal]
+            nodes[internal] = self._descend(nodes[internal], sub_values)
+        return nodes - self.capacity
+
+    def _descend(self, nodes: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Move one level down, updating `values` in place to the remainder."""
+        left = 2 * nodes
+        left_sum = self.tree[left]
+        go_right = values >= left_sum
+        np.subtract(values, left_sum, out=values, where=go_right)
+        return left + go_right
+
+
+class MinTree(SumTree):
+    """Flat-array min tree; unused leaves hold `+inf`."""
+
+    _fill = np.inf
+
+    def _combine(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        return np.minimum(left, right)
+
+    def min(self) -> float:
+        """Minimum over all leaf values."""
+        return self.root
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """``ReplayBuffer`` with proportional prioritized sampling.
+
+    New transitions get the largest priority seen so far, so every
+    transition is replayed at least once with high probability. Their tree
+    entries are written lazily, in one batched update before the next
+    ``sample``, which keeps ``add`` O(1).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        state_shape: Tuple[int, ...] = (2,),
+        state_dtype: np.dtype = np.float32,
+        action_dtype: np.dtype = np.int64,
+        alpha: float = 0.6,
+        eps: float = 1e-6,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Allocate the buffer and its priority trees.
+
+        Parameters
+        ----------
+        capacity, state_shape, state_dtype, action_dtype, seed
+            As for ``ReplayBuffer``.
+        alpha : float
+            Prioritisation exponent; 0 recovers uniform sampling.
+        eps : float
+            Added to absolute TD errors so no transition gets zero priority.
+        """
+        super().__init__(capacity, state_shape, state_dtype, action_dtype, seed)
+        self.alpha = alpha
+        self.eps = eps
+        self.max_priority = 1.0
+        self.sum_tree = SumTree(capacity)
+        self.min_tree = MinTree(capacity)
+        self._pending: List[int] = []
+
+    def add(self, state, action, reward: float, next_state, done: bool) -> int:
+        """Insert one transition with the current maximum priority."""
+        i = super().add(state, action, reward, next_state, done)
+        self._pending.append(i)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones) -> np.ndarray:
+        """Insert a batch of transitions with the current maximum priority."""
+        self._flush()
+        idx = super().add_batch(states, actions, rewards, next_states, dones)
+        self._set_priorities(idx, self.max_priority)
+        return idx
+
+    def _set_priorities(self, indices: np.ndarray, priorities) -> None:
+        scaled = np.power(priorities, self.alpha)
+        self.sum_tree.update(indices, scaled)
+        self.min_tree.update(indices, scaled)
+
+    def _flush(self) -> None:
+        """Write the priorities of transitions added one at a time."""
+        if self._pending:
+            self._set_priorities(np.array(self._pending), self.max_priority)
+            self._pending = []
+
+    def sample(self, batch_size: int, beta: float = 0.4) -> Tuple[Batch, np.ndarray, np.ndarray]:
+        """Sample a batch proportionally to priority.
+
+        The total priority mass is split into `batch_size` equal segments
+        and one transition is drawn from each (stratified sampling).
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of transitions to sample.
+        beta : float
+            Importance-sampling exponent; 1 fully corrects the bias.
+
+        Returns
+        -------
+        batch : Batch
+            The sampled transitions.
+        weights : np.ndarray
+            Importance-sampling weights normalised to a maximum of 1
+            (float32).
+        indices : np.ndarray
+            Buffer slots of the samples, for ``update_priorities``.
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty buffer")
+        self._flush()
+        total = self.sum_tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = self.sum_tree.find_prefix(np.minimum(values, np.nextafter(total, 0)))
+        # Guard against rounding landing on a slot that was never written
+        indices = np.minimum(indices, self.size - 1)
+
+        probs = self.sum_tree[indices] / total
+        min_prob = self.min_tree.min() / total
+        weights = (probs / min_prob) ** -beta
+        return self.gather(indices), weights.astype(np.float32), indices
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        """Set priorities from the TD errors of a sampled batch.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            Slots returned by ``sample``.
+        td_errors : np.ndarray
+            TD errors of those transitions.
+        """
+        self._flush()
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self._set_priorities(indices, priorities)
@@ -15,20 +15,33 @@ Key functions:
   representation by capping queues at a specified maximum.
 * ``train_q_learning`` – runs the Q-learning algorithm for a number of
   episodes, updating the Q-table based on observed transitions.
+* ``iter_q_learning`` – the same training loop as a generator that yields
+  per-episode metrics while training runs.
+* ``train_q_learning_vectorized`` – trains on a ``VectorTrafficEnv``,
+  applying epsilon-greedy selection and TD updates to all environments at
+  once with array operations.
+* ``DenseQTable`` – a Q-table backed by one contiguous
+  ``(max_queue + 1, max_queue + 1, n_actions)`` array that still behaves
+  like the ``dict`` returned by default (``train_q_learning(dense=True)``).
 
 The training function returns both the learned Q-table and a list of
 metrics (e.g. average queue lengths) recorded across episodes so that
 progress can be analysed and visualised.
 """
 
-from typing import Dict, Tuple, List
+from collections.abc import Mapping
+import time
+from typing import Any, Callable, Dict, Iterator, Tuple, List, Optional, Union
 import numpy as np
 
 # Import the environment without using a relative import. When this module is
 # imported from a notebook or script with `src` on the Python path,
 # ``traffic_env`` resolves correctly. Relative imports require package
 # semantics, which are not available in this context.
-from traffic_env import TrafficEnv
+from traffic_env import TrafficEnv, VectorTrafficEnv
+from checkpoint import CheckpointWriter, load_checkpoint
+from early_stopping import EarlyStopping
+from instrumentation import Profiler, instrument_env, perf_counter_ns, uninstrument_env
 
 
 def discretise_state(state: Tuple[int, int], max_queue: int) -> Tuple[int, int]:
@@ -51,6 +64,80 @@ def discretise_state(state: Tuple[int, int], max_queue: int) -> Tuple[int, int]:
     return (min(ns, max_queue), min(ew, max_queue))
 
 
+class DenseQTable(Mapping):
+    """Q-table stored as a single dense array indexed by discretised state.
+
+    Because ``discretise_state`` clips queues at ``max_queue``, every
+    reachable state fits in an array of shape
+    ``(max_queue + 1, max_queue + 1, n_actions)``. The class implements the
+    read-only ``Mapping`` protocol over the states that have been visited so
+    that code written against the ``dict`` Q-table (``len(q_table)``,
+    ``q_table[state]``, ``q_table.items()``) keeps working. Rows returned by
+    ``q_table[state]`` are views into ``array``.
+
+    Parameters
+    ----------
+    max_queue : int
+        Maximum discretised queue length on each approach.
+    n_actions : int
+        Number of actions per state.
+    array : np.ndarray, optional
+        Existing Q-value array to wrap instead of allocating a new one.
+    visited : np.ndarray, optional
+        Boolean mask of visited states matching ``array``. Defaults to
+        all-False for a new array and all-True for a wrapped one.
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        n_actions: int = 2,
+        array: Optional[np.ndarray] = None,
+        visited: Optional[np.ndarray] = None,
+    ) -> None:
+        self.max_queue = max_queue
+        self.n_actions = n_actions
+        shape = (max_queue + 1, max_queue + 1)
+        if array is None:
+            array = np.zeros(shape + (n_actions,))
+            if visited is None:
+                visited = np.zeros(shape, dtype=bool)
+        elif array.shape != shape + (n_actions,):
+            raise ValueError(f"Expected Q-value array of shape {shape + (n_actions,)}, got {array.shape}")
+        if visited is None:
+            visited = np.ones(shape, dtype=bool)
+        self.array = array
+        self.visited = visited
+
+    def __getitem__(self, state: Tuple[int, int]) -> np.ndarray:
+        ns, ew = state
+        if not (0 <= ns <= self.max_queue and 0 <= ew <= self.max_queue) or not self.visited[ns, ew]:
+            raise KeyError(state)
+        return self.array[ns, ew]
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for ns, ew in zip(*np.nonzero(self.visited)):
+            yield (int(ns), int(ew))
+
+    def __len__(self) -> int:
+        return int(self.visited.sum())
+
+    def to_dict(self) -> Dict[Tuple[int, int], np.ndarray]:
+        """Return a ``dict`` copy in the format used by the default Q-table."""
+        return {state: values.copy() for state, values in self.items()}
+
+    @classmethod
+    def from_dict(
+        cls, q_table: Mapping, max_queue: int, n_actions: int = 2
+    ) -> "DenseQTable":
+        """Build a ``DenseQTable`` from a ``dict`` Q-table (values are copied)."""
+        dense = cls(max_queue, n_actions)
+        for (ns, ew), values in q_table.items():
+            dense.array[ns, ew] = values
+            dense.visited[ns, ew] = True
+        return dense
+
+
 def train_q_learning(
     env: TrafficEnv,
     episodes: int = 200,
@@ -58,7 +145,14 @@ def train_q_learning(
     alpha: float = 0.1,
     epsilon: float = 0.1,
     max_queue: int = 10,
-) -> Tuple[Dict[Tuple[int, int], np.ndarray], List[float]]:
+    dense: bool = False,
+    profiler: Optional[Profiler] = None,
+    early_stopping: Optional[EarlyStopping] = None,
+    callback: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: Optional[int] = None,
+    resume_from: Optional[Union[str, Dict[str, Any]]] = None,
+) -> Tuple[Union[Dict[Tuple[int, int], np.ndarray], DenseQTable], List[float]]:
     """Train a Q-learning agent on the provided environment.
 
     Parameters
@@ -77,23 +171,247 @@ def train_q_learning(
     max_queue : int
         Maximum queue length to discretise states. Higher values allow
         more granularity but increase the Q-table size.
+    dense : bool
+        If True, store the Q-table in a ``DenseQTable`` instead of a
+        ``dict``. The inner loop then indexes a flat float buffer directly
+        and avoids per-state allocations. Given the same random state the
+        learned values are identical to the ``dict`` version.
+    profiler : Profiler, optional
+        If given, time action selection (``agent.select_action``) and the
+        Q update (``agent.update``), count exploratory actions
+        (``agent.explore``), and instrument `env` for the duration of
+        training (see ``instrumentation.instrument_env``).
+    early_stopping : EarlyStopping, optional
+        If given, it is updated after every episode and training ends as
+        soon as it reports convergence. The stopping episode is reported to
+        `callback` as the metrics record with `early_stopped` set (and is
+        also kept as ``early_stopping.stopped_episode``); `avg_total_queues`
+        is correspondingly shorter. It is reset at the start of training.
+    callback : Callable[[Dict[str, Any]], Optional[bool]], optional
+        Called after every episode with the metrics yielded by
+        ``iter_q_learning`` (e.g. a ``MetricsWriter``). Returning True
+        stops training.
+    checkpoint_path : str, optional
+        File to write checkpoints to (see ``checkpoint``). Written every
+        `checkpoint_every` episodes, if given, and when training finishes.
+        Writes happen on a background thread and replace the file
+        atomically.
+    checkpoint_every : int, optional
+        Episodes between checkpoints; requires `checkpoint_path`.
+    resume_from : str or dict, optional
+        Checkpoint (path or loaded state) to continue from. The Q-table,
+        the random states of `env` and `np.random`, the metrics so far and
+        the early-stopping state are restored, so the result is
+        bit-identical to a run that was never interrupted. `env` must be
+        constructed with the same parameters as the original one.
 
     Returns
     -------
-    q_table : Dict[Tuple[int, int], np.ndarray]
+    q_table : Dict[Tuple[int, int], np.ndarray] or DenseQTable
         The learned Q-table mapping discretised states to action values.
     avg_total_queues : List[float]
         A list containing the average total queue length per episode. Useful
         for monitoring learning progress.
     """
-    # Initialise Q-table as a dictionary mapping state -> action value array
-    q_table: Dict[Tuple[int, int], np.ndarray] = {}
+    q_table: Union[Dict[Tuple[int, int], np.ndarray], DenseQTable] = (
+        DenseQTable(max_queue) if dense else {}
+    )
     avg_total_queues: List[float] = []
+    if isinstance(resume_from, str):
+        resume_from = load_checkpoint(resume_from)
+    if resume_from is not None:
+        avg_total_queues = list(resume_from["avg_total_queues"])
+    for metrics in iter_q_learning(env, episodes, gamma, alpha, epsilon, max_queue,
+                                   q_table, profiler, early_stopping,
+                                   checkpoint_path, checkpoint_every, resume_from):
+        avg_total_queues.append(metrics["avg_queue"])
+        if callback is not None and callback(metrics):
+            break
+    return q_table, avg_total_queues
 
-    for ep in range(episodes):
+
+def iter_q_learning(
+    env: TrafficEnv,
+    episodes: int = 200,
+    gamma: float = 0.95,
+    alpha: float = 0.1,
+    epsilon: float = 0.1,
+    max_queue: int = 10,
+    q_table: Optional[Union[Dict[Tuple[int, int], np.ndarray], DenseQTable]] = None,
+    profiler: Optional[Profiler] = None,
+    early_stopping: Optional[EarlyStopping] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: Optional[int] = None,
+    resume_from: Optional[Union[str, Dict[str, Any]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Run Q-learning and yield metrics after every episode.
+
+    This is the streaming form of ``train_q_learning``: progress can be
+    monitored (and a bad run abandoned by leaving the loop) while training
+    is still running.
+
+    Parameters
+    ----------
+    env, episodes, gamma, alpha, epsilon, max_queue, profiler, early_stopping
+        As for ``train_q_learning``.
+    checkpoint_path, checkpoint_every, resume_from
+        As for ``train_q_learning``. On resume, episodes already completed
+        are not yielded again.
+    q_table : dict or DenseQTable, optional
+        Q-table to update in place; pass it in to keep a reference to the
+        learned values. A ``DenseQTable`` selects the dense loop. Defaults
+        to a new ``dict``.
+
+    Yields
+    ------
+    Dict[str, Any]
+        `episode` (1-based), `avg_queue` (average total queue per step),
+        `max_queue` (largest total queue of the episode), `epsilon`,
+        `q_size` (number of visited states), `wall_time` (seconds since
+        training started) and `early_stopped`, which is True for the last
+        episode when `early_stopping` ended training after it.
+    """
+    if q_table is None:
+        q_table = {}
+    if checkpoint_every is not None and checkpoint_path is None:
+        raise ValueError("checkpoint_every requires checkpoint_path")
+    if early_stopping is not None:
+        early_stopping.reset()
+    dense = isinstance(q_table, DenseQTable)
+    if dense and q_table.max_queue != max_queue:
+        raise ValueError(f"q_table.max_queue={q_table.max_queue} does not match max_queue={max_queue}")
+
+    start_episode = 0
+    history: List[float] = []
+    wall_offset = 0.0
+    if resume_from is not None:
+        if isinstance(resume_from, str):
+            resume_from = load_checkpoint(resume_from)
+        _restore_training_state(resume_from, env, q_table, max_queue, early_stopping)
+        start_episode = resume_from["episode"]
+        history = list(resume_from["avg_total_queues"])
+        wall_offset = resume_from["wall_time"]
+
+    # Pick the loop once so the plain one carries no profiling checks
+    args = (env, q_table, start_episode, episodes, gamma, alpha, epsilon, max_queue)
+    if profiler is None:
+        loop = (_dense_episodes if dense else _dict_episodes)(*args)
+    else:
+        loop = (_dense_episodes_profiled if dense else _dict_episodes_profiled)(*args, profiler)
+
+    writer = CheckpointWriter(checkpoint_path) if checkpoint_path is not None else None
+    if profiler is not None:
+        instrument_env(env, profiler)
+    start = time.perf_counter() - wall_offset
+    episode = start_episode
+    saved_episode = None
+    try:
+        for episode, (total_queue, peak_queue) in enumerate(loop, start_episode + 1):
+            avg_queue = total_queue / env.max_steps
+            history.append(avg_queue)
+            stopped = False
+            if early_stopping is not None:
+                q_values = (q_table.array if dense
+                            else DenseQTable.from_dict(q_table, max_queue).array)
+                stopped = early_stopping.update(q_values, avg_queue)
+            yield {
+                "episode": episode,
+                "avg_queue": avg_queue,
+                "max_queue": peak_queue,
+                "epsilon": epsilon,
+                "q_size": len(q_table),
+                "wall_time": time.perf_counter() - start,
+                "early_stopped": stopped,
+            }
+            if stopped:
+                break
+            if writer is not None and checkpoint_every and episode % checkpoint_every == 0:
+                writer.submit(_training_state(episode, env, q_table, history, early_stopping,
+                                              time.perf_counter() - start))
+                saved_episode = episode
+        # Final checkpoint when training ends by itself (not when the caller
+        # stops consuming the generator)
+        if writer is not None and saved_episode != episode:
+            writer.submit(_training_state(episode, env, q_table, history, early_stopping,
+                                          time.perf_counter() - start))
+    finally:
+        if profiler is not None:
+            uninstrument_env(env)
+        if writer is not None:
+            writer.close()
+
+
+def _training_state(
+    episode: int,
+    env: TrafficEnv,
+    q_table: Union[Dict[Tuple[int, int], np.ndarray], DenseQTable],
+    history: List[float],
+    early_stopping: Optional[EarlyStopping],
+    wall_time: float,
+) -> Dict[str, Any]:
+    """Snapshot everything ``iter_q_learning`` needs to resume after `episode`."""
+    if isinstance(q_table, DenseQTable):
+        table: Dict[str, Any] = {"array": q_table.array.copy(), "visited": q_table.visited.copy()}
+    else:
+        table = {"dict": {state: values.copy() for state, values in q_table.items()}}
+    return {
+        "episode": episode,
+        "q_table": table,
+        "env": env.get_state(),
+        "np_random": np.random.get_state(),
+        "avg_total_queues": list(history),
+        "early_stopping": early_stopping.state_dict() if early_stopping is not None else None,
+        "wall_time": wall_time,
+    }
+
+
+def _restore_training_state(
+    state: Dict[str, Any],
+    env: TrafficEnv,
+    q_table: Union[Dict[Tuple[int, int], np.ndarray], DenseQTable],
+    max_queue: int,
+    early_stopping: Optional[EarlyStopping],
+) -> None:
+    """Load a ``_training_state`` snapshot into fresh training objects."""
+    table = state["q_table"]
+    if isinstance(q_table, DenseQTable):
+        if "array" not in table:
+            raise ValueError("Checkpoint holds a dict Q-table; resume with dense=False")
+        if table["array"].shape != q_table.array.shape:
+            raise ValueError(f"Checkpoint Q-table has shape {table['array'].shape}, "
+                             f"expected {q_table.array.shape} for max_queue={max_queue}")
+        q_table.array[...] = table["array"]
+        q_table.visited[...] = table["visited"]
+    else:
+        if "dict" not in table:
+            raise ValueError("Checkpoint holds a dense Q-table; resume with dense=True")
+        q_table.clear()
+        q_table.update((s, values.copy()) for s, values in table["dict"].items())
+    env.set_state(state["env"])
+    np.random.set_state(state["np_random"])
+    if early_stopping is not None and state["early_stopping"] is not None:
+        early_stopping.load_state_dict(state["early_stopping"])
+
+
+def _dict_episodes(
+    env: TrafficEnv,
+    q_table: Dict[Tuple[int, int], np.ndarray],
+    start_episode: int,
+    episodes: int,
+    gamma: float,
+    alpha: float,
+    epsilon: float,
+    max_queue: int,
+) -> Iterator[Tuple[float, float]]:
+    """Training loop over a ``dict`` Q-table.
+
+    Yields the total and the largest total queue length of each episode.
+    """
+    for ep in range(start_episode, episodes):
         state = env.reset()
         disc_state = discretise_state(state, max_queue)
         total_queue = 0
+        peak_queue = 0
 
         done = False
         while not done:
@@ -128,7 +446,290 @@ def train_q_learning(
             # Move to next state
             disc_state = disc_next_state
             total_queue += -(reward)  # reward is negative total queue
+            if -reward > peak_queue:
+                peak_queue = -reward
+
+        yield total_queue, peak_queue
+
+
+def _dict_episodes_profiled(
+    env: TrafficEnv,
+    q_table: Dict[Tuple[int, int], np.ndarray],
+    start_episode: int,
+    episodes: int,
+    gamma: float,
+    alpha: float,
+    epsilon: float,
+    max_queue: int,
+    profiler: Profiler,
+) -> Iterator[Tuple[float, float]]:
+    """``_dict_episodes`` with the agent's phases timed by `profiler`."""
+    for ep in range(start_episode, episodes):
+        state = env.reset()
+        disc_state = discretise_state(state, max_queue)
+        total_queue = 0
+        peak_queue = 0
+
+        done = False
+        while not done:
+            # Initialise row in Q-table if unseen
+            if disc_state not in q_table:
+                q_table[disc_state] = np.zeros(2)  # two actions
+
+            # Epsilon-greedy action selection
+            t0 = perf_counter_ns()
+            if np.random.rand() < epsilon:
+                action = env.sample_action()
+                profiler.count("agent.explore")
+            else:
+                # Choose the action with the highest Q-value (break ties randomly)
+                best_actions = np.flatnonzero(
+                    q_table[disc_state] == q_table[disc_state].max()
+                )
+                action = int(np.random.choice(best_actions))
+            profiler.record("agent.select_action", t0)
+
+            next_state, reward, done, _ = env.step(action)
+            t0 = perf_counter_ns()
+            disc_next_state = discretise_state(next_state, max_queue)
+
+            # Initialise next state in Q-table if unseen
+            if disc_next_state not in q_table:
+                q_table[disc_next_state] = np.zeros(2)
+
+            # Q-learning update rule
+            old_value = q_table[disc_state][action]
+            next_max = q_table[disc_next_state].max()
+            q_table[disc_state][action] = old_value + alpha * (
+                reward + gamma * next_max - old_value
+            )
+            profiler.record("agent.update", t0)
+
+            # Move to next state
+            disc_state = disc_next_state
+            total_queue += -(reward)  # reward is negative total queue
+            if -reward > peak_queue:
+                peak_queue = -reward
+
+        yield total_queue, peak_queue
+
+
+def _dense_episodes(
+    env: TrafficEnv,
+    q_table: DenseQTable,
+    start_episode: int,
+    episodes: int,
+    gamma: float,
+    alpha: float,
+    epsilon: float,
+    max_queue: int,
+) -> Iterator[Tuple[float, float]]:
+    """Training loop over a ``DenseQTable``.
+
+    The loop mirrors the ``dict`` version step for step (including the
+    random draws used for exploration and tie-breaking) but addresses
+    Q-values through a ``memoryview`` of the flat array, so reads and
+    writes are plain Python floats without hashing or tuple allocation.
+    """
+    q = memoryview(q_table.array.reshape(-1))
+    visited = memoryview(q_table.visited.reshape(-1))
+    width = max_queue + 1
+
+    for ep in range(start_episode, episodes):
+        ns, ew = env.reset()
+        cell = min(ns, max_queue) * width + min(ew, max_queue)
+        visited[cell] = True
+        base = 2 * cell
+        total_queue = 0
+        peak_queue = 0
+
+        done = False
+        while not done:
+            # Epsilon-greedy action selection
+            if np.random.rand() < epsilon:
+                action = env.sample_action()
+            else:
+                q0, q1 = q[base], q[base + 1]
+                if q0 == q1:
+                    # Same draw as np.random.choice over two tied actions
+                    action = int(np.random.randint(2))
+                else:
+                    action = 0 if q0 > q1 else 1
+
+            (ns, ew), reward, done, _ = env.step(action)
+            cell = min(ns, max_queue) * width + min(ew, max_queue)
+            visited[cell] = True
+            next_base = 2 * cell
+
+            # Q-learning update rule
+            old_value = q[base + action]
+            next_max = max(q[next_base], q[next_base + 1])
+            q[base + action] = old_value + alpha * (reward + gamma * next_max - old_value)
+
+            base = next_base
+            total_queue += -(reward)
+            if -reward > peak_queue:
+                peak_queue = -reward
+
+        yield total_queue, peak_queue
+
+
+def _dense_episodes_profiled(
+    env: TrafficEnv,
+    q_table: DenseQTable,
+    start_episode: int,
+    episodes: int,
+    gamma: float,
+    alpha: float,
+    epsilon: float,
+    max_queue: int,
+    profiler: Profiler,
+) -> Iterator[Tuple[float, float]]:
+    """``_dense_episodes`` with the agent's phases timed by `profiler`."""
+    q = memoryview(q_table.array.reshape(-1))
+    visited = memoryview(q_table.visited.reshape(-1))
+    width = max_queue + 1
+
+    for ep in range(start_episode, episodes):
+        ns, ew = env.reset()
+        cell = min(ns, max_queue) * width + min(ew, max_queue)
+        visited[cell] = True
+        base = 2 * cell
+        total_queue = 0
+        peak_queue = 0
+
+        done = False
+        while not done:
+            # Epsilon-greedy action selection
+            t0 = perf_counter_ns()
+            if np.random.rand() < epsilon:
+                action = env.sample_action()
+                profiler.count("agent.explore")
+            else:
+                q0, q1 = q[base], q[base + 1]
+                if q0 == q1:
+                    # Same draw as np.random.choice over two tied actions
+                    action = int(np.random.randint(2))
+                else:
+                    action = 0 if q0 > q1 else 1
+            profiler.record("agent.select_action", t0)
+
+            (ns, ew), reward, done, _ = env.step(action)
+            t0 = perf_counter_ns()
+            cell = min(ns, max_queue) * width + min(ew, max_queue)
+            visited[cell] = True
+            next_base = 2 * cell
+
+            # Q-learning update rule
+            old_value = q[base + action]
+            next_max = max(q[next_base], q[next_base + 1])
+            q[base + action] = old_value + alpha * (reward + gamma * next_max - old_value)
+            profiler.record("agent.update", t0)
+
+            base = next_base
+            total_queue += -(reward)
+            if -reward > peak_queue:
+                peak_queue = -reward
+
+        yield total_queue, peak_queue
+
+
+def train_q_learning_vectorized(
+    env: VectorTrafficEnv,
+    episodes: int = 200,
+    gamma: float = 0.95,
+    alpha: Union[float, np.ndarray] = 0.1,
+    epsilon: Union[float, np.ndarray] = 0.1,
+    max_queue: int = 10,
+    shared: bool = True,
+) -> Tuple[Union[DenseQTable, List[DenseQTable]], np.ndarray]:
+    """Train Q-learning on all sub-environments of a ``VectorTrafficEnv`` in lockstep.
+
+    Every step selects actions for all ``env.num_envs`` intersections with
+    one batched epsilon-greedy draw and applies their TD updates with array
+    operations, so the cost per step grows with array width rather than
+    with the number of Python iterations. Exploration and tie-breaking use
+    ``env.rng``, so runs are reproducible from the environment seed.
+
+    Parameters
+    ----------
+    env : VectorTrafficEnv
+        The batch of environments to train on.
+    episodes : int
+        Number of training episodes (each sub-environment runs this many).
+    gamma : float
+        Discount factor for future rewards.
+    alpha : float or np.ndarray
+        Learning rate. An array of shape ``(env.num_envs,)`` gives every
+        sub-environment its own rate, which is handy for parameter sweeps
+        with ``shared=False``.
+    epsilon : float or np.ndarray
+        Epsilon-greedy exploration rate, scalar or one per sub-environment.
+    max_queue : int
+        Maximum queue length to discretise states.
+    shared : bool
+        If True, all sub-environments update one shared Q-table; updates
+        that hit the same state-action pair in a step are averaged. If
+        False, each sub-environment learns its own independent table.
+
+    Returns
+    -------
+    q_table : DenseQTable or List[DenseQTable]
+        The shared Q-table, or one table per sub-environment (views into a
+        single array) when ``shared`` is False.
+    avg_total_queues : np.ndarray
+        Array of shape ``(episodes, env.num_envs)`` with the average total
+        queue length per episode for each sub-environment.
+    """
+    n_envs = env.num_envs
+    width = max_queue + 1
+    n_cells = width * width
+    n_tables = 1 if shared else n_envs
+    q = np.zeros(n_tables * n_cells * 2)
+    visited = np.zeros(n_tables * n_cells, dtype=bool)
+    offsets = 0 if shared else np.arange(n_envs) * n_cells
+    rng = env.rng
+
+    def to_cells(states: np.ndarray) -> np.ndarray:
+        clipped = np.minimum(states, max_queue)
+        return offsets + clipped[:, 0] * width + clipped[:, 1]
+
+    cells = to_cells(env.reset())
+    visited[cells] = True
+    avg_total_queues = np.empty((episodes, n_envs))
+
+    for ep in range(episodes):
+        total_queue = np.zeros(n_envs)
+        for _ in range(env.max_steps):
+            # Epsilon-greedy action selection (break ties randomly)
+            q0 = q[2 * cells]
+            q1 = q[2 * cells + 1]
+            greedy = np.where(q0 == q1, rng.integers(0, 2, size=n_envs), q1 > q0)
+            explore = rng.random(n_envs) < epsilon
+            actions = np.where(explore, rng.integers(0, 2, size=n_envs), greedy)
+
+            next_states, rewards, _, info = env.step(actions)
+            next_cells = to_cells(info["final_state"])
+            visited[next_cells] = True
+
+            # Q-learning update rule, batched over environments
+            idx = 2 * cells + actions
+            next_max = np.maximum(q[2 * next_cells], q[2 * next_cells + 1])
+            td = alpha * (rewards + gamma * next_max - q[idx])
+            if shared:
+                counts = np.bincount(idx, minlength=q.size)
+                q += np.bincount(idx, weights=td, minlength=q.size) / np.maximum(counts, 1)
+            else:
+                q[idx] += td
+
+            # Sub-environments were reset automatically at the episode end
+            cells = to_cells(next_states)
+            total_queue -= rewards
 
-        avg_total_queues.append(total_queue / env.max_steps)
+        visited[cells] = True
+        avg_total_queues[ep] = total_queue / env.max_steps
 
-    return q_table, avg_total_queues
\ No newline at end of file
+    q = q.reshape(n_tables, width, width, 2)
+    visited = visited.reshape(n_tables, width, width)
+    tables = [DenseQTable(max_queue, array=q[i], visited=visited[i]) for i in range(n_tables)]
+    return (tables[0] if shared else tables), avg_total_queues
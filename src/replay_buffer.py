@@ -0,0 +1,189 @@
+"""
+replay_buffer.py
+-----------------
+
+This module provides the experience replay memory for the DQN agent. A
+natural implementation keeps a `deque` of `(state, action, reward,
+next_state, done)` tuples, which allocates several Python objects per
+transition and has to rebuild arrays from a list comprehension on every
+sample. `ReplayBuffer` instead preallocates one fixed-capacity NumPy array per
+field and treats them as a ring: inserting a transition is a handful of array
+writes, and sampling a batch is one random index draw followed by one gather
+per field, which returns contiguous arrays ready for the network.
+
+Key concepts:
+
+* **Capacity** – once full, the oldest transitions are overwritten.
+* **Batches** – ``sample`` returns a ``Batch`` named tuple of arrays; use
+  ``to_torch`` to turn it into tensors that share memory with those arrays.
+* **Vector environments** – ``add_batch`` inserts one step of a
+  ``VectorTrafficEnv`` (or any batch of transitions) in a single call.
+
+Example
+-------
+
+```python
+from traffic_env import TrafficEnv
+from replay_buffer import ReplayBuffer
+
+env = TrafficEnv()
+buffer = ReplayBuffer(capacity=100_000, state_shape=(2,), seed=0)
+state = env.reset()
+next_state, reward, done, _ = env.step(0)
+buffer.add(state, 0, reward, next_state, done)
+batch = buffer.sample(1)
+```
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Uniform draws generated per refill of the sampling block
+_UNIFORM_BLOCK = 1 << 16
+
+
+class Batch(NamedTuple):
+    """A batch of transitions, one array (or tensor) per field."""
+
+    states: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    next_states: np.ndarray
+    dones: np.ndarray
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions stored in NumPy arrays."""
+
+    def __init__(
+        self,
+        capacity: int,
+        state_shape: Tuple[int, ...] = (2,),
+        state_dtype: np.dtype = np.float32,
+        action_dtype: np.dtype = np.int64,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Allocate the buffer.
+
+        Parameters
+        ----------
+        capacity : int
+            Maximum number of transitions held.
+        state_shape : Tuple[int, ...]
+            Shape of a single state, e.g. `(2,)` for `TrafficEnv`.
+        state_dtype : np.dtype
+            Storage dtype for states; `float32` matches typical network
+            inputs so sampled batches need no conversion.
+        action_dtype : np.dtype
+            Storage dtype for actions.
+        seed : int, optional
+            Seed for the sampling generator.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.states = np.zeros((capacity,) + tuple(state_shape), dtype=state_dtype)
+        self.next_states = np.zeros_like(self.states)
+        self.actions = np.zeros(capacity, dtype=action_dtype)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.rng = np.random.default_rng(seed)
+        self._uniforms = np.empty(0)
+        self._cursor = 0
+        self.position = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, state, action, reward: float, next_state, done: bool) -> int:
+        """Insert one transition, overwriting the oldest when full.
+
+        Returns
+        -------
+        int
+            The slot the transition was written to.
+        """
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def add_batch(
+        self,
+        states: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        next_states: np.ndarray,
+        dones: np.ndarray,
+    ) -> np.ndarray:
+        """Insert a batch of transitions (e.g. one vector-environment step).
+
+        Returns
+        -------
+        np.ndarray
+            The slots the transitions were written to, in order.
+        """
+        n = len(actions)
+        if n > self.capacity:
+            raise ValueError(f"Batch of {n} transitions exceeds capacity {self.capacity}")
+        idx = (self.position + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def gather(self, indices: np.ndarray) -> Batch:
+        """Return the transitions stored at `indices` as contiguous arrays."""
+        return Batch(
+            self.states.take(indices, axis=0),
+            self.actions.take(indices),
+            self.rewards.take(indices),
+            self.next_states.take(indices, axis=0),
+            self.dones.take(indices),
+        )
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """Draw `batch_size` slot indices uniformly with replacement.
+
+        Uniform floats are generated in large blocks and scaled by the
+        current size, which is several times cheaper per call than
+        `Generator.integers`.
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty buffer")
+        if self._cursor + batch_size > len(self._uniforms):
+            self._uniforms = self.rng.random(max(_UNIFORM_BLOCK, batch_size))
+            self._cursor = 0
+        u = self._uniforms[self._cursor:self._cursor + batch_size]
+        self._cursor += batch_size
+        return (u * self.size).astype(np.intp)
+
+    def sample(self, batch_size: int) -> Batch:
+        """Sample `batch_size` transitions uniformly with replacement."""
+        return self.gather(self.sample_indices(batch_size))
+
+
+def to_torch(batch: Batch, device: Optional[str] = None) -> Batch:
+    """Convert a batch of arrays to torch tensors.
+
+    `torch.from_numpy` shares memory with the sampled arrays, so no copy is
+    made unless `device` requests a transfer.
+    """
+    import torch
+
+    tensors = [torch.from_numpy(array) for array in batch]
+    if device is not None:
+        tensors = [tensor.to(device, non_blocking=True) for tensor in tensors]
+    return Batch(*tensors)
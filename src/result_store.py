@@ -0,0 +1,120 @@
+"""
+result_store.py
+----------------
+
+A small on‑disk cache of per‑seed evaluation results.  Multi‑seed
+sweeps can run for hours, and keeping results only in memory means a
+crash loses every completed seed.  ``ResultStore`` persists each
+``(config hash, seed) -> metrics`` entry to a local SQLite database as
+soon as it is produced, so an interrupted sweep can be resumed by
+skipping the seeds that are already stored, and statistics can be
+recomputed without retraining anything.
+
+A configuration is identified by ``config_hash(config)``, a stable
+digest of a JSON‑serialisable dictionary describing everything that
+affects the result (training function, hyper‑parameters, environment
+settings).  Changing any of these produces a new hash, so stale results
+are never reused by accident.
+
+Example
+-------
+
+```python
+store = ResultStore("data/multi_seed_results.sqlite")
+key = config_hash({"train_fn": "train_agent", "episodes": 200})
+done = store.completed(key)
+for seed in range(10):
+    if seed not in done:
+        store.put(key, seed, {"performance": train_agent(seed)})
+```
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Mapping, Optional
+
+
+def config_hash(config: Mapping[str, Any]) -> str:
+    """Return a stable hex digest identifying a configuration.
+
+    Args:
+        config: JSON‑serialisable description of the run.  Key order does
+            not matter; values that are not JSON types are hashed via
+            ``str()``.
+
+    Returns:
+        str: A 16‑character SHA‑256 prefix.
+    """
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResultStore:
+    """SQLite‑backed mapping of ``(config_hash, seed)`` to metric dicts.
+
+    Every ``put`` is committed immediately, so results survive a crash of
+    the calling process.  The store can be used as a context manager.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (or create) the store.
+
+        Args:
+            path: Location of the SQLite database file.  Parent
+                directories are created if needed.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " config_hash TEXT NOT NULL,"
+            " seed INTEGER NOT NULL,"
+            " metrics TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " PRIMARY KEY (config_hash, seed))"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, seed: int) -> Optional[Dict[str, Any]]:
+        """Return the stored metrics for ``(key, seed)``, or ``None``."""
+        row = self._conn.execute(
+            "SELECT metrics FROM results WHERE config_hash = ? AND seed = ?",
+            (key, seed),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: str, seed: int, metrics: Mapping[str, Any]) -> None:
+        """Store (or overwrite) the metrics for ``(key, seed)`` and commit."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+            (key, seed, json.dumps(dict(metrics)), time.time()),
+        )
+        self._conn.commit()
+
+    def completed(self, key: str) -> Dict[int, Dict[str, Any]]:
+        """Return all stored results for a configuration, keyed by seed."""
+        rows = self._conn.execute(
+            "SELECT seed, metrics FROM results WHERE config_hash = ? ORDER BY seed",
+            (key,),
+        )
+        return {seed: json.loads(metrics) for seed, metrics in rows}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+__all__ = ["config_hash", "ResultStore"]
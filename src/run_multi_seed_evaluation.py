@@ -27,12 +27,45 @@ collects the performance metric for each run, and then computes the
 mean and 95 % confidence interval.  Optionally, it performs a
 paired t‐test to assess whether the agent’s performance is
 significantly better than a baseline【520273785081046†L50-L63】.
+
+Seeds are independent, so ``--workers N`` fans them out across a pool of
+``N`` processes (``--workers 0`` uses every core).  Results are printed
+as each seed finishes and sorted by seed before the statistics are
+computed, so the output matches a sequential run.
+
+Each finished seed is also written to a ``ResultStore`` (SQLite, by
+default ``data/multi_seed_results.sqlite``) keyed by a hash of the run
+configuration.  Rerunning the script skips seeds that are already
+stored, so an interrupted sweep resumes where it stopped and the
+statistics can be recomputed without retraining.  Pass ``--no-store``
+to disable this.
+
+The hash covers the training function's name, ``TRAIN_CONFIG`` (the
+hyper‑parameters and environment settings ``train_agent`` uses; keep it
+in sync with your implementation), the contents of an optional
+``--config`` JSON file and ``--tag``.  Code changes are not detected:
+bump ``--tag`` whenever the training or environment code changes, or
+stale results will be reused.
 """
 
+import argparse
+import json
+import os
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
-from typing import List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 import scipy.stats as stats
 
+from result_store import ResultStore, config_hash
+
+DEFAULT_STORE = Path(__file__).resolve().parents[1] / "data" / "multi_seed_results.sqlite"
+
+# Hyper-parameters and environment settings used by ``train_agent``.  They
+# are part of the result-store key, so cached seeds are only reused when
+# the configuration matches.  Update this alongside ``train_agent``.
+TRAIN_CONFIG: Dict[str, Any] = {}
+
 
 def train_agent(seed: int) -> float:
     """Placeholder for training your RL agent with a specific seed.
@@ -84,8 +117,71 @@ def compute_mean_ci(values: List[float], confidence: float = 0.95) -> Tuple[floa
     return mean, half_width
 
 
-def main() -> None:
-    N_SEEDS = 5  # Adjust number of seeds as needed
+def run_seeds(
+    seeds: Sequence[int],
+    train_fn: Callable[[int], float] = train_agent,
+    workers: int = 1,
+) -> Iterator[Tuple[int, float]]:
+    """Train and evaluate one run per seed, yielding results as they finish.
+
+    Args:
+        seeds: Random seeds to run.
+        train_fn: Picklable function mapping a seed to a performance
+            metric (defaults to ``train_agent``).
+        workers: Number of worker processes.  ``1`` runs the seeds in
+            order in the current process; ``0`` uses ``os.cpu_count()``.
+
+    Yields:
+        ``(seed, performance)`` pairs in completion order.  An exception
+        raised by ``train_fn`` cancels the remaining seeds and is
+        re‑raised here.
+    """
+    if not seeds:
+        return
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for seed in seeds:
+            yield seed, train_fn(seed)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(seeds)))
+    try:
+        futures = {pool.submit(train_fn, seed): seed for seed in seeds}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def main(
+    argv: Optional[Sequence[str]] = None,
+    train_config: Optional[Mapping[str, Any]] = None,
+) -> None:
+    """Run the sweep.
+
+    Args:
+        argv: Command-line arguments (defaults to ``sys.argv[1:]``).
+        train_config: Training and environment configuration included in
+            the result-store key (defaults to ``TRAIN_CONFIG``).
+    """
+    parser = argparse.ArgumentParser(description="Multi-seed evaluation of the RL agent.")
+    parser.add_argument("--seeds", type=int, default=5,
+                        help="number of seeds to train (default: 5)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; 0 uses all cores (default: 1)")
+    parser.add_argument("--store", default=str(DEFAULT_STORE),
+                        help="SQLite file caching per-seed results")
+    parser.add_argument("--no-store", action="store_true",
+                        help="do not read or write cached results")
+    parser.add_argument("--tag", default="",
+                        help="label included in the configuration hash; "
+                             "bump it when the training code changes")
+    parser.add_argument("--config", default=None,
+                        help="JSON file with training/environment settings "
+                             "included in the configuration hash")
+    args = parser.parse_args(argv)
+    N_SEEDS = args.seeds
 
     # Evaluate baseline once (deterministic or averaged over seeds)
     try:
@@ -94,15 +190,42 @@ def main() -> None:
         print("Please implement evaluate_baseline() before running.")
         return
 
-    performances: List[float] = []
-    for seed in range(N_SEEDS):
-        try:
-            perf = train_agent(seed)
-        except NotImplementedError:
-            print("Please implement train_agent() before running.")
-            return
-        performances.append(perf)
-        print(f"Seed {seed}: performance = {perf:.3f}")
+    # Identify the run so cached results are only reused for the same setup
+    file_config: Dict[str, Any] = {}
+    if args.config is not None:
+        with open(args.config, encoding="utf-8") as fh:
+            file_config = json.load(fh)
+    config = {
+        "train_fn": f"{train_agent.__module__}.{train_agent.__qualname__}",
+        "train_config": dict(TRAIN_CONFIG if train_config is None else train_config),
+        "config_file": file_config,
+        "tag": args.tag,
+    }
+    key = config_hash(config)
+    store = None if args.no_store else ResultStore(args.store)
+
+    results = {}
+    if store is not None:
+        for seed, metrics in store.completed(key).items():
+            if seed < N_SEEDS:
+                results[seed] = metrics["performance"]
+                print(f"Seed {seed}: performance = {results[seed]:.3f} (cached)")
+    pending = [seed for seed in range(N_SEEDS) if seed not in results]
+
+    try:
+        if pending:
+            for seed, perf in run_seeds(pending, train_agent, args.workers):
+                results[seed] = perf
+                if store is not None:
+                    store.put(key, seed, {"performance": perf})
+                print(f"Seed {seed}: performance = {perf:.3f}")
+    except NotImplementedError:
+        print("Please implement train_agent() before running.")
+        return
+    finally:
+        if store is not None:
+            store.close()
+    performances: List[float] = [results[seed] for seed in sorted(results)]
 
     mean, half_width = compute_mean_ci(performances)
     print(f"\nAgent mean performance: {mean:.3f} ± {half_width:.3f} (95% CI)")
@@ -29,6 +29,21 @@ The environment exposes a familiar `reset()`/`step()` interface similar to
 OpenAI Gym. It is deliberately simple enough to illustrate the core
 reinforcement learning loop without requiring external packages.
 
+Arrivals are drawn from a `random.Random` stream by default. Passing
+`presample_arrivals=True` instead draws a whole episode of arrivals for both
+approaches at `reset()` with a single NumPy `Generator` call, and `step` adds
+them by index. The sequence is bit-identical across runs for a given seed but
+differs from the default stream.
+
+For large-scale training the module also provides `VectorTrafficEnv`, which
+holds many independent intersections as NumPy arrays and advances all of them
+with a single `step(actions)` call. Sub-environment `i` follows exactly the
+same trajectory as `TrafficEnv(seed=seed + i)` under the same actions.
+
+Both environments can be snapshotted with `get_state()` and restored with
+`set_state(state)`, which makes lookahead planning and branch-and-evaluate
+possible from any intermediate state without re-simulating from the start.
+
 Example
 -------
 
@@ -46,7 +61,28 @@ while not done:
 """
 
 import random
-from typing import Tuple, Dict
+import weakref
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Steps of arrivals drawn per NumPy call when `presample_arrivals` is True;
+# episodes are sliced from this pool so the call overhead is amortised
+_ARRIVAL_POOL_STEPS = 4096
+
+
+class TrafficEnvState(NamedTuple):
+    """Snapshot of a `TrafficEnv`, as returned by `TrafficEnv.get_state`."""
+
+    steps: int
+    ns_queue: int
+    ew_queue: int
+    random_state: Tuple[Any, ...]
+    arrival_rng_state: Optional[Dict[str, Any]]
+    ns_arrivals: List[int]
+    ew_arrivals: List[int]
+    arrival_pool: Tuple[List[int], List[int]]
+    arrival_pool_index: int
 
 
 class TrafficEnv:
@@ -59,6 +95,7 @@ class TrafficEnv:
         arrival_rate_ew: float = 0.5,
         depart_rate: int = 2,
         seed: int = 0,
+        presample_arrivals: bool = False,
     ) -> None:
         """
         Initialise the environment.
@@ -75,6 +112,13 @@ class TrafficEnv:
             Number of cars that can leave the queue when the light is green.
         seed : int
             Random seed for reproducibility.
+        presample_arrivals : bool
+            If True, draw each episode's arrivals at `reset()` from a NumPy
+            `Generator` seeded with `seed` instead of calling
+            `random.random()` twice per step. Another `max_steps` of
+            arrivals is drawn if an episode runs past its end (or `step` is
+            called before `reset`). `self.random` is still used by
+            `sample_action`.
         """
         self.max_steps = max_steps
         self.arrival_rate_ns = arrival_rate_ns
@@ -84,6 +128,15 @@ class TrafficEnv:
         self.steps = 0
         self.ns_queue = 0
         self.ew_queue = 0
+        self._arrival_rng = np.random.default_rng(seed) if presample_arrivals else None
+        self._ns_arrivals: List[int] = []
+        self._ew_arrivals: List[int] = []
+        self._pool_ns: List[int] = []
+        self._pool_ew: List[int] = []
+        self._pool_index = 0
+        if presample_arrivals:
+            # Pick the step once so the default path carries no mode check
+            self.step = self._presampled_step
 
     def reset(self) -> Tuple[int, int]:
         """Reset the environment to its initial state.
@@ -96,8 +149,28 @@ class TrafficEnv:
         self.steps = 0
         self.ns_queue = 0
         self.ew_queue = 0
+        if self._arrival_rng is not None:
+            self._ns_arrivals, self._ew_arrivals = self._take_arrivals()
         return (self.ns_queue, self.ew_queue)
 
+    def _take_arrivals(self) -> Tuple[List[int], List[int]]:
+        """Return the next `max_steps` steps of north–south and east–west arrivals.
+
+        Episodes are cut from a pool drawn with one `Generator` call. The
+        unused remainder is kept when the pool is refilled, so the arrival
+        sequence does not depend on the pool size.
+        """
+        start = self._pool_index
+        end = start + self.max_steps
+        if end > len(self._pool_ns):
+            uniforms = self._arrival_rng.random((max(_ARRIVAL_POOL_STEPS, self.max_steps), 2))
+            # Plain Python bools index and add much faster than NumPy scalars
+            self._pool_ns = self._pool_ns[start:] + (uniforms[:, 0] < self.arrival_rate_ns).tolist()
+            self._pool_ew = self._pool_ew[start:] + (uniforms[:, 1] < self.arrival_rate_ew).tolist()
+            start, end = 0, self.max_steps
+        self._pool_index = end
+        return self._pool_ns[start:end], self._pool_ew[start:end]
+
     def _arrivals(self) -> None:
         """Simulate new vehicle arrivals for both directions."""
         # Bernoulli arrival: each step, a car may arrive with probability arrival_rate
@@ -148,6 +221,32 @@ class TrafficEnv:
         info = {"t": self.steps}
         return next_state, reward, done, info
 
+    def _presampled_step(self, action: int) -> Tuple[Tuple[int, int], float, bool, Dict[str, float]]:
+        """`step` for `presample_arrivals=True`: adds this step's arrivals by index."""
+        if action not in (0, 1):
+            raise ValueError("Action must be 0 (NS green) or 1 (EW green)")
+        t = self.steps
+        try:
+            ns_arrival = self._ns_arrivals[t]
+        except IndexError:
+            # Past the end of the drawn episode: extend it (new lists, since
+            # snapshots share the old ones)
+            ns_more, ew_more = self._take_arrivals()
+            self._ns_arrivals = self._ns_arrivals + ns_more
+            self._ew_arrivals = self._ew_arrivals + ew_more
+            ns_arrival = self._ns_arrivals[t]
+        if action == 0:
+            ns = max(0, self.ns_queue - self.depart_rate) + ns_arrival
+            ew = self.ew_queue + self._ew_arrivals[t]
+        else:
+            ns = self.ns_queue + ns_arrival
+            ew = max(0, self.ew_queue - self.depart_rate) + self._ew_arrivals[t]
+        self.ns_queue = ns
+        self.ew_queue = ew
+        t += 1
+        self.steps = t
+        return (ns, ew), -(ns + ew), t >= self.max_steps, {"t": t}
+
     @property
     def state(self) -> Tuple[int, int]:
         """Return the current state without advancing the environment."""
@@ -155,4 +254,397 @@ class TrafficEnv:
 
     def sample_action(self) -> int:
         """Return a random action (useful for exploration)."""
-        return self.random.choice([0, 1])
\ No newline at end of file
+        return self.random.choice([0, 1])
+
+    def get_state(self) -> TrafficEnvState:
+        """Return a snapshot of the environment for ``set_state``.
+
+        The snapshot covers the queues, the step counter and all random
+        state, so restoring it replays exactly the same future. It costs a
+        few microseconds: the presampled arrival lists are shared rather than
+        copied, which is safe because they are replaced, never modified.
+        """
+        rng = self._arrival_rng
+        return TrafficEnvState(
+            self.steps,
+            self.ns_queue,
+            self.ew_queue,
+            self.random.getstate(),
+            rng.bit_generator.state if rng is not None else None,
+            self._ns_arrivals,
+            self._ew_arrivals,
+            (self._pool_ns, self._pool_ew),
+            self._pool_index,
+        )
+
+    def set_state(self, state: TrafficEnvState) -> None:
+        """Restore a snapshot taken by ``get_state``.
+
+        A snapshot can be restored any number of times, e.g. once per
+        branch of a lookahead search. The environment must have been created
+        with the same `presample_arrivals` setting.
+        """
+        if (state.arrival_rng_state is None) != (self._arrival_rng is None):
+            raise ValueError("State was taken from an environment with a different presample_arrivals setting")
+        self.steps = state.steps
+        self.ns_queue = state.ns_queue
+        self.ew_queue = state.ew_queue
+        self.random.setstate(state.random_state)
+        if self._arrival_rng is not None:
+            self._arrival_rng.bit_generator.state = state.arrival_rng_state
+            self._ns_arrivals = state.ns_arrivals
+            self._ew_arrivals = state.ew_arrivals
+            self._pool_ns, self._pool_ew = state.arrival_pool
+            self._pool_index = state.arrival_pool_index
+
+
+def advance_queues(
+    ns_queue: np.ndarray,
+    ew_queue: np.ndarray,
+    actions: np.ndarray,
+    ns_arrivals: np.ndarray,
+    ew_arrivals: np.ndarray,
+    depart_rate: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply one step of `TrafficEnv` dynamics to arrays of queues.
+
+    Departures on the green approach happen first, followed by arrivals,
+    mirroring `TrafficEnv.step`.
+
+    Parameters
+    ----------
+    ns_queue, ew_queue : np.ndarray
+        Current queue lengths for each intersection.
+    actions : np.ndarray
+        Signal phase per intersection (0 for north–south green, 1 for
+        east–west green).
+    ns_arrivals, ew_arrivals : np.ndarray
+        Boolean (or 0/1 integer) arrival indicators for this step.
+    depart_rate : int
+        Number of cars that can leave the queue when the light is green.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The updated `(ns_queue, ew_queue)` arrays.
+    """
+    ns_green = actions == 0
+    ns_queue = np.where(ns_green, np.maximum(ns_queue - depart_rate, 0), ns_queue)
+    ew_queue = np.where(ns_green, ew_queue, np.maximum(ew_queue - depart_rate, 0))
+    return ns_queue + ns_arrivals, ew_queue + ew_arrivals
+
+
+class VectorEnvState:
+    """Snapshot of a `VectorTrafficEnv`, as returned by `VectorTrafficEnv.get_state`.
+
+    `draws` counts the episodes drawn from each arrival stream so far.
+    `stream_states` maps a sub-environment index to its stream state at that
+    count; it is filled in lazily by the environment, just before the stream
+    moves past the snapshot. `arrival_rng_state` is the shared arrival
+    generator's state when `exact_streams` is False, else None.
+    """
+
+    __slots__ = ("seed", "steps", "ns_queue", "ew_queue", "ns_arrivals", "ew_arrivals",
+                 "draws", "rng_state", "arrival_rng_state", "stream_states", "__weakref__")
+
+    def __init__(
+        self,
+        seed: int,
+        steps: np.ndarray,
+        ns_queue: np.ndarray,
+        ew_queue: np.ndarray,
+        ns_arrivals: np.ndarray,
+        ew_arrivals: np.ndarray,
+        draws: np.ndarray,
+        rng_state: Dict[str, Any],
+        arrival_rng_state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.seed = seed
+        self.steps = steps
+        self.ns_queue = ns_queue
+        self.ew_queue = ew_queue
+        self.ns_arrivals = ns_arrivals
+        self.ew_arrivals = ew_arrivals
+        self.draws = draws
+        self.rng_state = rng_state
+        self.arrival_rng_state = arrival_rng_state
+        self.stream_states: Dict[int, Tuple[Any, ...]] = {}
+
+
+def _numpy_stream(seed: int) -> np.random.RandomState:
+    """Return a NumPy `RandomState` producing the same `random()` sequence as
+    `random.Random(seed)`.
+
+    Both generators are MT19937 and derive doubles from two 32-bit words in
+    the same way, so copying the internal state is enough to make
+    `RandomState.random_sample` bit-identical to `random.Random.random`.
+    """
+    _, internal, _ = random.Random(seed).getstate()
+    stream = np.random.RandomState()
+    stream.set_state(("MT19937", np.array(internal[:-1], dtype=np.uint32), internal[-1]))
+    return stream
+
+
+class VectorTrafficEnv:
+    """A batch of independent `TrafficEnv` intersections stepped as arrays.
+
+    The queues and step counters of all intersections live in NumPy arrays
+    (`ns_queue`, `ew_queue`, `steps`) and `step(actions)` advances every
+    intersection at once. Finished sub-environments are reset automatically.
+
+    Sub-environment `i` reproduces `TrafficEnv(seed=seed + i)` exactly:
+    its arrival stream is drawn from an MT19937 state copied from
+    `random.Random(seed + i)`, one whole episode at a time. The equivalence
+    holds as long as episodes are run to completion and the single
+    environment does not consume its stream elsewhere (for example through
+    `TrafficEnv.sample_action`). Arrivals are drawn by `reset()`, so it must
+    be called before the first `step()`.
+
+    Exact streams do not scale with width: every episode boundary draws each
+    finished sub-environment's arrivals from its own stream in a Python loop,
+    which takes about half the runtime at 4096 sub-environments. With
+    `exact_streams=False` all finished sub-environments draw from one shared
+    `Generator` in a single call instead; trajectories are then reproducible
+    for a given seed but no longer match `TrafficEnv`.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        max_steps: int = 60,
+        arrival_rate_ns: float = 0.5,
+        arrival_rate_ew: float = 0.5,
+        depart_rate: int = 2,
+        seed: int = 0,
+        exact_streams: bool = True,
+    ) -> None:
+        """
+        Initialise the vectorised environment.
+
+        Parameters
+        ----------
+        num_envs : int
+            Number of intersections simulated in parallel.
+        max_steps : int
+            Number of time steps per episode.
+        arrival_rate_ns : float
+            Probability of a car arriving per step in the north–south direction.
+        arrival_rate_ew : float
+            Probability of a car arriving per step in the east–west direction.
+        depart_rate : int
+            Number of cars that can leave the queue when the light is green.
+        seed : int
+            Base random seed; sub-environment `i` uses `seed + i`.
+        exact_streams : bool
+            If True, give every sub-environment its own arrival stream so it
+            matches `TrafficEnv(seed=seed + i)`. If False, draw the arrivals
+            of all sub-environments that reset together with one call to a
+            shared `Generator`, which is much faster for large `num_envs`.
+        """
+        if num_envs < 1:
+            raise ValueError("num_envs must be at least 1")
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.arrival_rate_ns = arrival_rate_ns
+        self.arrival_rate_ew = arrival_rate_ew
+        self.depart_rate = depart_rate
+        self.seed = seed
+        self.exact_streams = exact_streams
+        self.rng = np.random.default_rng(seed)
+        if exact_streams:
+            self._streams = [_numpy_stream(seed + i) for i in range(num_envs)]
+            self._arrival_rng = None
+        else:
+            # Kept apart from `self.rng` so sampling actions does not shift arrivals
+            self._streams = []
+            self._arrival_rng = np.random.default_rng([seed, 1])
+        self._draws = np.zeros(num_envs, dtype=np.int64)
+        self._snapshots: "weakref.WeakSet[VectorEnvState]" = weakref.WeakSet()
+        self._rows = np.arange(num_envs)
+        self._ns_arrivals = np.zeros((num_envs, max_steps), dtype=bool)
+        self._ew_arrivals = np.zeros((num_envs, max_steps), dtype=bool)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.ns_queue = np.zeros(num_envs, dtype=np.int64)
+        self.ew_queue = np.zeros(num_envs, dtype=np.int64)
+        self._needs_reset = True
+
+    def _draw_arrivals(self, env_ids: np.ndarray) -> None:
+        """Draw a full episode of arrivals for the given sub-environments."""
+        if self._arrival_rng is not None:
+            uniforms = self._arrival_rng.random((len(env_ids), 2 * self.max_steps))
+        else:
+            self._pin_streams(env_ids)
+            uniforms = np.empty((len(env_ids), 2 * self.max_steps))
+            for row, i in enumerate(env_ids):
+                uniforms[row] = self._streams[i].random_sample(2 * self.max_steps)
+            self._draws[env_ids] += 1
+        # TrafficEnv draws the north–south sample before the east–west one
+        self._ns_arrivals[env_ids] = uniforms[:, 0::2] < self.arrival_rate_ns
+        self._ew_arrivals[env_ids] = uniforms[:, 1::2] < self.arrival_rate_ew
+
+    def _pin_streams(self, env_ids: np.ndarray) -> None:
+        """Save the stream states of `env_ids` into every live snapshot that
+        was taken at the current draw count, before the streams move on."""
+        for snapshot in self._snapshots:
+            for i in env_ids[snapshot.draws[env_ids] == self._draws[env_ids]]:
+                if i not in snapshot.stream_states:
+                    snapshot.stream_states[i] = self._streams[i].get_state()
+
+    def _replay_stream(self, i: int, draws: int) -> np.random.RandomState:
+        """Rebuild the stream of sub-environment `i` after `draws` episodes."""
+        stream = _numpy_stream(self.seed + i)
+        remaining = draws * 2 * self.max_steps
+        while remaining > 0:
+            chunk = min(remaining, 1 << 20)
+            stream.random_sample(chunk)
+            remaining -= chunk
+        return stream
+
+    def _reset_envs(self, env_ids: np.ndarray) -> None:
+        """Reset a subset of sub-environments to their initial state."""
+        self.steps[env_ids] = 0
+        self.ns_queue[env_ids] = 0
+        self.ew_queue[env_ids] = 0
+        self._draw_arrivals(env_ids)
+
+    def reset(self) -> np.ndarray:
+        """Reset every sub-environment.
+
+        Returns
+        -------
+        states : np.ndarray
+            Array of shape `(num_envs, 2)` holding `(ns_queue, ew_queue)`.
+        """
+        self._reset_envs(self._rows)
+        self._needs_reset = False
+        return self.state
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Advance every sub-environment by one step.
+
+        Parameters
+        ----------
+        actions : np.ndarray
+            Array of shape `(num_envs,)` with one action per sub-environment
+            (0 for north–south green, 1 for east–west green).
+
+        Returns
+        -------
+        next_states : np.ndarray
+            Array of shape `(num_envs, 2)`. Sub-environments that finished
+            their episode have already been reset, so their row holds the
+            initial state of the next episode.
+        rewards : np.ndarray
+            Negative total queue length per sub-environment.
+        dones : np.ndarray
+            Boolean mask of sub-environments whose episode ended this step.
+        info : Dict[str, np.ndarray]
+            `"t"` holds the step counter reached by each sub-environment and
+            `"final_state"` the state reached before any automatic reset.
+        """
+        if self._needs_reset:
+            raise RuntimeError("Call reset() before step()")
+        actions = np.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f"Expected actions of shape ({self.num_envs},), got {actions.shape}")
+        if ((actions != 0) & (actions != 1)).any():
+            raise ValueError("Action must be 0 (NS green) or 1 (EW green)")
+
+        t = self.steps
+        self.ns_queue, self.ew_queue = advance_queues(
+            self.ns_queue,
+            self.ew_queue,
+            actions,
+            self._ns_arrivals[self._rows, t],
+            self._ew_arrivals[self._rows, t],
+            self.depart_rate,
+        )
+        self.steps = t + 1
+
+        final_state = self.state
+        rewards = -final_state.sum(axis=1).astype(np.float64)
+        dones = self.steps >= self.max_steps
+        info = {"t": self.steps.copy(), "final_state": final_state}
+
+        if dones.any():
+            self._reset_envs(np.flatnonzero(dones))
+        return self.state, rewards, dones, info
+
+    @property
+    def state(self) -> np.ndarray:
+        """Return the current states as an array of shape `(num_envs, 2)`."""
+        return np.stack([self.ns_queue, self.ew_queue], axis=1)
+
+    def sample_actions(self) -> np.ndarray:
+        """Return one random action per sub-environment."""
+        return self.rng.integers(0, 2, size=self.num_envs)
+
+    def get_state(self) -> VectorEnvState:
+        """Return a snapshot of every sub-environment for ``set_state``.
+
+        The snapshot copies the queue, step and presampled arrival arrays (a
+        few bytes per sub-environment and step) plus a per-stream draw
+        count. The MT19937 stream states (about 2.5 KB each, ~50 µs to read)
+        are not copied up front: the environment saves a stream's state into
+        the snapshot only when that sub-environment is about to draw its next
+        episode, so taking a snapshot costs O(num_envs * max_steps) array
+        copies and lookahead within an episode never touches the streams.
+        Each live snapshot adds that one-off cost per sub-environment whose
+        episode ends while it is alive. With `exact_streams=False` only the
+        shared arrival generator's state is recorded.
+        """
+        arrival_rng = self._arrival_rng
+        snapshot = VectorEnvState(
+            self.seed,
+            self.steps.copy(),
+            self.ns_queue.copy(),
+            self.ew_queue.copy(),
+            self._ns_arrivals.copy(),
+            self._ew_arrivals.copy(),
+            self._draws.copy(),
+            self.rng.bit_generator.state,
+            arrival_rng.bit_generator.state if arrival_rng is not None else None,
+        )
+        if arrival_rng is None:
+            self._snapshots.add(snapshot)
+        return snapshot
+
+    def set_state(self, state: VectorEnvState) -> None:
+        """Restore a snapshot taken by ``get_state``.
+
+        Arrays are copied in, so the snapshot stays valid and can be
+        restored any number of times. Only streams whose draw count differs
+        from the snapshot are touched. A snapshot from another environment
+        with the same seed is accepted; streams it did not capture are
+        rebuilt by replaying them from the seed, which costs time
+        proportional to the number of episodes drawn.
+        """
+        if state.steps.shape != (self.num_envs,) or state.ns_arrivals.shape != self._ns_arrivals.shape:
+            raise ValueError("State was taken from an environment with a different num_envs or max_steps")
+        if state.seed != self.seed:
+            raise ValueError("State was taken from an environment with a different seed")
+        if (state.arrival_rng_state is None) != (self._arrival_rng is None):
+            raise ValueError("State was taken from an environment with a different exact_streams setting")
+        if self._arrival_rng is not None:
+            self._arrival_rng.bit_generator.state = state.arrival_rng_state
+        changed = np.flatnonzero(state.draws != self._draws)
+        self._pin_streams(changed)
+        for i in changed:
+            stream_state = state.stream_states.get(i)
+            if stream_state is None:
+                self._streams[i] = self._replay_stream(i, int(state.draws[i]))
+            else:
+                self._streams[i].set_state(stream_state)
+        self._draws[...] = state.draws
+        self.steps = state.steps.copy()
+        self.ns_queue = state.ns_queue.copy()
+        self.ew_queue = state.ew_queue.copy()
+        self._ns_arrivals[...] = state.ns_arrivals
+        self._ew_arrivals[...] = state.ew_arrivals
+        self.rng.bit_generator.state = state.rng_state
+        self._needs_reset = False
+        if self._arrival_rng is None:
+            # The snapshot is now also valid for this environment's streams
+            self._snapshots.add(state)
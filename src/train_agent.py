@@ -0,0 +1,425 @@
+"""
+train_agent.py
+---------------
+
+Command-line entry point for training the traffic signal agents.
+
+The main algorithm is a Deep Q-Network (DQN) with experience replay and a
+target network. Training is organised for CPU throughput:
+
+* **Vectorised collection** – transitions are gathered from a vector
+  environment (`VectorTrafficEnv`, `SharedMemoryVecEnv` or anything with the
+  same `reset()`/`step(actions)` interface), with one batched forward pass to
+  choose the actions of every sub-environment. A plain `TrafficEnv` is wrapped
+  as a vector environment of size one.
+* **Batched updates** – minibatches come straight out of the preallocated
+  ``ReplayBuffer`` (or ``PrioritizedReplayBuffer``) as contiguous arrays and
+  are wrapped as tensors without copying.
+* **Replay ratio** – `replay_ratio` sets the number of gradient steps per
+  environment transition, so collection and learning can be balanced
+  independently of the number of environments.
+* **Thread tuning** – `num_threads` is passed to `torch.set_num_threads`; for
+  small networks a few threads are usually faster than one per core.
+
+Progress reports include environment steps per second and gradient updates
+per second.
+
+Usage
+-----
+
+    python src/train_agent.py --algo dqn --num-envs 16 --total-steps 200000
+    python src/train_agent.py --algo dqn --env configs/intersection.cfg --threads 4
+    python src/train_agent.py --algo q_learning --episodes 500
+
+`--env` points to an INI file whose `[env]` section overrides `TrafficEnv`
+parameters, for example::
+
+    [env]
+    max_steps = 60
+    arrival_rate_ns = 0.6
+    arrival_rate_ew = 0.4
+    depart_rate = 2
+"""
+
+import argparse
+import configparser
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+
+from policy_io import save_q_table
+from prioritized_replay import PrioritizedReplayBuffer
+from q_learning_agent import train_q_learning
+from replay_buffer import ReplayBuffer, to_torch
+from traffic_env import TrafficEnv, VectorTrafficEnv
+
+
+class QNetwork(nn.Module):
+    """Multi-layer perceptron mapping a state to one Q-value per action.
+
+    Queue lengths are divided by `obs_scale` inside the network so that raw
+    environment states can be fed in directly.
+    """
+
+    def __init__(self, obs_dim: int = 2, n_actions: int = 2, hidden_size: int = 64,
+                 obs_scale: float = 10.0) -> None:
+        super().__init__()
+        self.obs_scale = obs_scale
+        self.layers = nn.Sequential(
+            nn.Linear(obs_dim, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, n_actions),
+        )
+
+    def forward(self, states: torch.Tensor) -> torch.Tensor:
+        return self.layers(states.flatten(1) / self.obs_scale)
+
+
+class _SingleEnvAdapter:
+    """Expose a `TrafficEnv` through the vector-environment interface."""
+
+    def __init__(self, env: TrafficEnv) -> None:
+        self.env = env
+        self.num_envs = 1
+        self.max_steps = env.max_steps
+
+    def reset(self) -> np.ndarray:
+        return np.asarray([self.env.reset()])
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        state, reward, done, info = self.env.step(int(actions[0]))
+        final_state = np.asarray([state])
+        if done:
+            state = self.env.reset()
+        info = {"t": np.array([info["t"]]), "final_state": final_state}
+        return np.asarray([state]), np.array([reward], dtype=np.float64), np.array([done]), info
+
+
+def linear_schedule(start: float, end: float, duration: int, t: int) -> float:
+    """Linearly anneal from `start` to `end` over `duration` steps."""
+    fraction = min(t / max(duration, 1), 1.0)
+    return start + fraction * (end - start)
+
+
+def train_dqn(
+    env,
+    total_steps: int = 100_000,
+    gamma: float = 0.95,
+    lr: float = 1e-3,
+    batch_size: int = 256,
+    buffer_size: int = 100_000,
+    learning_starts: int = 1_000,
+    replay_ratio: float = 0.25,
+    target_update_interval: int = 500,
+    epsilon_start: float = 1.0,
+    epsilon_end: float = 0.05,
+    exploration_fraction: float = 0.3,
+    hidden_size: int = 64,
+    prioritized: bool = False,
+    per_beta_start: float = 0.4,
+    num_threads: Optional[int] = None,
+    seed: int = 0,
+    log_interval: float = 5.0,
+) -> Tuple[QNetwork, Dict[str, Any]]:
+    """Train a DQN agent on a `TrafficEnv` or a vector environment.
+
+    Parameters
+    ----------
+    env : TrafficEnv or vector environment
+        Environment to collect experience from. Vector environments must
+        auto-reset and report terminal states in `info["final_state"]`.
+    total_steps : int
+        Number of environment transitions to collect (summed over
+        sub-environments).
+    gamma : float
+        Discount factor.
+    lr : float
+        Adam learning rate.
+    batch_size : int
+        Minibatch size per gradient step.
+    buffer_size : int
+        Replay buffer capacity.
+    learning_starts : int
+        Transitions to collect before the first gradient step.
+    replay_ratio : float
+        Gradient steps per environment transition, e.g. 0.25 means one
+        update for every four transitions.
+    target_update_interval : int
+        Gradient steps between target network synchronisations.
+    epsilon_start, epsilon_end : float
+        Initial and final epsilon-greedy exploration rates.
+    exploration_fraction : float
+        Fraction of `total_steps` over which epsilon is annealed.
+    hidden_size : int
+        Width of the hidden layers.
+    prioritized : bool
+        Use ``PrioritizedReplayBuffer`` instead of uniform replay.
+    per_beta_start : float
+        Initial importance-sampling exponent for prioritized replay; it is
+        annealed linearly to 1 over `total_steps`.
+    num_threads : int, optional
+        Passed to `torch.set_num_threads` if given.
+    seed : int
+        Seed for network initialisation, exploration and replay sampling.
+    log_interval : float
+        Seconds between progress reports; 0 disables them.
+
+    Returns
+    -------
+    q_network : QNetwork
+        The trained online network.
+    stats : Dict[str, Any]
+        Counters, throughput (`env_steps_per_sec`, `updates_per_sec`, both
+        over the time spent in each phase, and `wall_time`) and
+        `episode_avg_queues`, the average total queue of every finished
+        episode.
+    """
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    if isinstance(env, TrafficEnv):
+        env = _SingleEnvAdapter(env)
+    n_envs = env.num_envs
+
+    states = env.reset()
+    obs_shape = states.shape[1:]
+    q_network = QNetwork(int(np.prod(obs_shape)), 2, hidden_size)
+    target_network = QNetwork(int(np.prod(obs_shape)), 2, hidden_size)
+    target_network.load_state_dict(q_network.state_dict())
+    optimizer = torch.optim.Adam(q_network.parameters(), lr=lr)
+    buffer_cls = PrioritizedReplayBuffer if prioritized else ReplayBuffer
+    buffer = buffer_cls(buffer_size, state_shape=obs_shape, seed=seed)
+
+    env_steps = updates = 0
+    update_credit = 0.0
+    collect_time = update_time = 0.0
+    episode_queue = np.zeros(n_envs)
+    episode_len = np.zeros(n_envs)
+    episode_avg_queues: List[float] = []
+    start = last_log = time.perf_counter()
+
+    while env_steps < total_steps:
+        # Collect one step from every sub-environment
+        t0 = time.perf_counter()
+        epsilon = linear_schedule(epsilon_start, epsilon_end,
+                                  int(exploration_fraction * total_steps), env_steps)
+        with torch.no_grad():
+            q_values = q_network(torch.from_numpy(states.astype(np.float32)))
+        actions = q_values.argmax(dim=1).numpy()
+        explore = rng.random(n_envs) < epsilon
+        actions = np.where(explore, rng.integers(0, 2, size=n_envs), actions)
+
+        next_states, rewards, dones, info = env.step(actions)
+        # Episodes only end at the time limit, so the target bootstraps from
+        # the final state (as train_q_learning does) and done is stored False
+        buffer.add_batch(states, actions, rewards, info["final_state"], np.zeros(n_envs))
+        states = next_states
+        env_steps += n_envs
+
+        episode_queue -= rewards
+        episode_len += 1
+        for i in np.flatnonzero(dones):
+            episode_avg_queues.append(episode_queue[i] / episode_len[i])
+        episode_queue[dones] = 0
+        episode_len[dones] = 0
+        collect_time += time.perf_counter() - t0
+
+        # Gradient steps according to the replay ratio
+        if env_steps < learning_starts:
+            continue
+        t0 = time.perf_counter()
+        update_credit += replay_ratio * n_envs
+        beta = linear_schedule(per_beta_start, 1.0, total_steps, env_steps)
+        while update_credit >= 1:
+            update_credit -= 1
+            _dqn_update(q_network, target_network, optimizer, buffer, batch_size, gamma,
+                        prioritized, beta)
+            updates += 1
+            if updates % target_update_interval == 0:
+                target_network.load_state_dict(q_network.state_dict())
+        update_time += time.perf_counter() - t0
+
+        now = time.perf_counter()
+        if log_interval and now - last_log >= log_interval:
+            last_log = now
+            recent = np.mean(episode_avg_queues[-100:]) if episode_avg_queues else float("nan")
+            print(f"steps {env_steps:>9d}  updates {updates:>8d}  eps {epsilon:.3f}  "
+                  f"avg queue {recent:6.3f}  "
+                  f"env steps/s {env_steps / max(collect_time, 1e-9):9.0f}  "
+                  f"updates/s {updates / max(update_time, 1e-9):7.0f}")
+
+    stats = {
+        "env_steps": env_steps,
+        "updates": updates,
+        "wall_time": time.perf_counter() - start,
+        "env_steps_per_sec": env_steps / max(collect_time, 1e-9),
+        "updates_per_sec": updates / max(update_time, 1e-9),
+        "episode_avg_queues": episode_avg_queues,
+    }
+    return q_network, stats
+
+
+def _dqn_update(
+    q_network: QNetwork,
+    target_network: QNetwork,
+    optimizer: torch.optim.Optimizer,
+    buffer: ReplayBuffer,
+    batch_size: int,
+    gamma: float,
+    prioritized: bool,
+    beta: float = 0.4,
+) -> None:
+    """Perform one gradient step on a replay minibatch."""
+    if prioritized:
+        batch, weights, indices = buffer.sample(batch_size, beta=beta)
+        weights = torch.from_numpy(weights)
+    else:
+        batch = buffer.sample(batch_size)
+    batch = to_torch(batch)
+
+    with torch.no_grad():
+        next_q = target_network(batch.next_states).max(dim=1).values
+        targets = batch.rewards + gamma * (1 - batch.dones) * next_q
+    q_taken = q_network(batch.states).gather(1, batch.actions.unsqueeze(1)).squeeze(1)
+    td_errors = targets - q_taken
+
+    losses = nn.functional.smooth_l1_loss(q_taken, targets, reduction="none")
+    loss = (weights * losses).mean() if prioritized else losses.mean()
+    optimizer.zero_grad(set_to_none=True)
+    loss.backward()
+    optimizer.step()
+
+    if prioritized:
+        buffer.update_priorities(indices, td_errors.detach().numpy())
+
+
+def evaluate_dqn(q_network: QNetwork, env, episodes: int = 10) -> float:
+    """Evaluate the greedy policy of a trained network.
+
+    Parameters
+    ----------
+    q_network : QNetwork
+        Trained network.
+    env : TrafficEnv or vector environment
+        Environment to evaluate on; a vector environment runs `episodes`
+        episodes on each sub-environment.
+    episodes : int
+        Number of episodes (per sub-environment).
+
+    Returns
+    -------
+    float
+        Mean average total queue length per step, the metric used by
+        ``train_q_learning`` and ``evaluate_baseline``.
+    """
+    if isinstance(env, TrafficEnv):
+        env = _SingleEnvAdapter(env)
+    states = env.reset()
+    total_queue = np.zeros(env.num_envs)
+    with torch.no_grad():
+        for _ in range(episodes * env.max_steps):
+            actions = q_network(torch.from_numpy(states.astype(np.float32))).argmax(dim=1).numpy()
+            states, rewards, _, _ = env.step(actions)
+            total_queue -= rewards
+    return float(total_queue.mean() / (episodes * env.max_steps))
+
+
+def load_env_config(path: Optional[str]) -> Dict[str, Any]:
+    """Read `TrafficEnv` keyword arguments from the `[env]` section of an INI file."""
+    if path is None:
+        return {}
+    parser = configparser.ConfigParser()
+    if not parser.read(path):
+        raise FileNotFoundError(f"Environment config not found: {path}")
+    section = parser["env"] if parser.has_section("env") else {}
+    kwargs: Dict[str, Any] = {}
+    for key in ("max_steps", "depart_rate"):
+        if key in section:
+            kwargs[key] = int(section[key])
+    for key in ("arrival_rate_ns", "arrival_rate_ew"):
+        if key in section:
+            kwargs[key] = float(section[key])
+    return kwargs
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train a traffic signal control agent.")
+    parser.add_argument("--algo", choices=["dqn", "q_learning"], default="dqn")
+    parser.add_argument("--env", default=None, help="INI file with an [env] section")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--num-envs", type=int, default=16,
+                        help="parallel environments for DQN collection")
+    parser.add_argument("--total-steps", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--buffer-size", type=int, default=100_000)
+    parser.add_argument("--replay-ratio", type=float, default=0.25,
+                        help="gradient steps per environment transition")
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--gamma", type=float, default=0.95)
+    parser.add_argument("--prioritized", action="store_true",
+                        help="use prioritized experience replay")
+    parser.add_argument("--per-beta-start", type=float, default=0.4,
+                        help="initial prioritized replay importance-sampling exponent, "
+                             "annealed linearly to 1 (default: 0.4)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="torch.set_num_threads value")
+    parser.add_argument("--episodes", type=int, default=200,
+                        help="training episodes for --algo q_learning")
+    parser.add_argument("--eval-episodes", type=int, default=20)
+    parser.add_argument("--save", default=None,
+                        help="path for the trained network weights (.pt) or Q-table (.npy)")
+    args = parser.parse_args(argv)
+
+    env_kwargs = load_env_config(args.env)
+
+    if args.algo == "q_learning":
+        np.random.seed(args.seed)
+        env = TrafficEnv(seed=args.seed, **env_kwargs)
+        start = time.perf_counter()
+        q_table, avg_total_queues = train_q_learning(env, episodes=args.episodes,
+                                                     gamma=args.gamma, dense=True)
+        elapsed = time.perf_counter() - start
+        print(f"Trained {args.episodes} episodes in {elapsed:.2f}s "
+              f"({args.episodes * env.max_steps / elapsed:.0f} transitions/s)")
+        print(f"Final average total queue: {np.mean(avg_total_queues[-20:]):.3f}")
+        if args.save:
+            save_q_table(args.save, q_table, env=env, metadata={"episodes": args.episodes,
+                                                                "gamma": args.gamma})
+            print(f"Saved Q-table to {args.save}")
+        return
+
+    env = VectorTrafficEnv(args.num_envs, seed=args.seed, **env_kwargs)
+    q_network, stats = train_dqn(
+        env,
+        total_steps=args.total_steps,
+        gamma=args.gamma,
+        lr=args.lr,
+        batch_size=args.batch_size,
+        buffer_size=args.buffer_size,
+        replay_ratio=args.replay_ratio,
+        prioritized=args.prioritized,
+        per_beta_start=args.per_beta_start,
+        num_threads=args.threads,
+        seed=args.seed,
+    )
+    print(f"\nCollected {stats['env_steps']} transitions and ran {stats['updates']} updates "
+          f"in {stats['wall_time']:.1f}s")
+    print(f"Env steps/s: {stats['env_steps_per_sec']:.0f}   Updates/s: {stats['updates_per_sec']:.0f}")
+
+    eval_env = VectorTrafficEnv(args.num_envs, seed=args.seed + 10_000, **env_kwargs)
+    score = evaluate_dqn(q_network, eval_env, episodes=args.eval_episodes)
+    print(f"Greedy policy average total queue: {score:.3f}")
+
+    if args.save:
+        torch.save(q_network.state_dict(), args.save)
+        print(f"Saved network weights to {args.save}")
+
+
+if __name__ == "__main__":
+    main()